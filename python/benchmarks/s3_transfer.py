@@ -0,0 +1,76 @@
+"""
+Compara a transferência padrão com o modo paralelo do S3Manager.
+
+Roda contra qualquer endpoint compatível com S3, por exemplo um moto_server ou MinIO local:
+
+    moto_server -p 5000
+    cd python && python -m benchmarks.s3_transfer --endpoint-url http://localhost:5000 --size-mb 256
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from boto3.s3.transfer import TransferConfig
+
+from storage.s3 import S3Manager, MB
+
+
+def timed(label: str, size: int, function) -> None:
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed:8.2f}s {size / MB / elapsed:10.1f} MB/s')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='S3Manager transfer benchmark')
+    parser.add_argument('--endpoint-url', default='http://localhost:5000')
+    parser.add_argument('--region-name', default='us-east-1')
+    parser.add_argument('--bucket', default='s3-transfer-benchmark')
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--part-size-mb', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--max-memory-mb', type=int, default=512)
+    args = parser.parse_args()
+
+    size = args.size_mb * MB
+    payload = os.urandom(size)
+    object_name = 'benchmark/artifact.bin'
+
+    s3_manager = S3Manager(
+        region_name=args.region_name,
+        endpoint_url=args.endpoint_url,
+        part_size=args.part_size_mb * MB,
+        max_concurrency=args.concurrency,
+        max_memory=args.max_memory_mb * MB
+    )
+    s3_manager.client.create_bucket(Bucket=args.bucket)
+
+    timed('upload (single stream)', size, lambda: s3_manager.client.upload_fileobj(
+        io.BytesIO(payload), args.bucket, object_name,
+        Config=TransferConfig(multipart_threshold=size + 1, max_concurrency=1)
+    ))
+    timed('upload (parallel multipart)', size,
+          lambda: s3_manager.upload_file_obj(io.BytesIO(payload), args.bucket, object_name))
+
+    timed('download (get_object)', size,
+          lambda: s3_manager.get_object(args.bucket, object_name)['Body'].read())
+
+    with tempfile.TemporaryDirectory() as directory:
+        destination = os.path.join(directory, 'artifact.bin')
+        timed('download_to (ranged, mmap)', size,
+              lambda: s3_manager.download_to(args.bucket, object_name, destination))
+
+        with open(destination, 'rb') as file:
+            assert file.read() == payload, 'Downloaded content does not match the uploaded payload'
+
+    buffer = bytearray(size)
+    timed('download_to (ranged, bytearray)', size,
+          lambda: s3_manager.download_to(args.bucket, object_name, buffer))
+    assert buffer == payload, 'Downloaded content does not match the uploaded payload'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Stand-in local para os benchmarks: um servidor moto em processo e injeção de latência e throttling nos clientes.
+
+Requer moto com o extra de servidor (pip install "moto[server]") quando nenhum endpoint externo é informado.
+"""
+import logging
+import random
+import socket
+import time
+
+from botocore.awsrequest import AWSResponse
+
+
+class _EmptyBody:
+
+    def stream(self, **kwargs):
+        yield b''
+
+
+class FaultInjector:
+    """
+    Atrasa cada requisição e responde uma fração delas com HTTP 429 (Too Many Requests).
+
+    O status 429 é reconhecido como throttling pelo retry do botocore, por is_throttling_error e pelo
+    AdaptiveConcurrencyLimiter em qualquer protocolo, pois não depende do corpo da resposta.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, throttle_rate: float = 0.0, seed: int = 42) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.throttled = 0
+
+    def attach(self, client) -> None:
+        client.meta.events.register('before-send', self.before_send, unique_id='benchmark-fault-injector')
+
+    def before_send(self, request, **kwargs):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            self.throttled += 1
+            return AWSResponse(request.url, 429, {'x-amzn-ErrorType': 'ThrottlingException'}, _EmptyBody())
+
+        return None
+
+
+class LocalStandIn:
+    """Inicia um servidor moto em uma porta livre (ou usa endpoint_url, se informado) durante o bloco with."""
+
+    def __init__(self, endpoint_url: str = None) -> None:
+        self.endpoint_url = endpoint_url
+        self.server = None
+
+    def __enter__(self) -> 'LocalStandIn':
+        if self.endpoint_url is None:
+            from moto.server import ThreadedMotoServer
+
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+            with socket.socket() as probe:
+                probe.bind(('127.0.0.1', 0))
+                port = probe.getsockname()[1]
+
+            self.server = ThreadedMotoServer(ip_address='127.0.0.1', port=port, verbose=False)
+            self.server.start()
+            self.endpoint_url = f'http://127.0.0.1:{port}'
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.server is not None:
+            self.server.stop()
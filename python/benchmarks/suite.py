@@ -0,0 +1,235 @@
+"""
+Benchmarks offline das operações mais usadas de cada manager, contra um stand-in local.
+
+Mede vazão e latências p50/p95/p99 e salva o resultado em JSON para comparação entre versões:
+
+    cd python
+    python -m benchmarks.suite --latency 0.02 --throttle-rate 0.05 --output results.json
+    python -m benchmarks.suite --latency 0.02 --baseline results.json
+"""
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from benchmarks.standin import FaultInjector, LocalStandIn
+
+REGION_NAME = 'us-east-1'
+
+
+class Benchmark(NamedTuple):
+    name: str
+    operation: Callable[[], Any]
+    iterations: int
+    concurrency: int = 1
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def run_benchmark(benchmark: Benchmark) -> Dict[str, Any]:
+    latencies = []
+    errors = 0
+
+    def timed_call(_):
+        start = time.perf_counter()
+        try:
+            benchmark.operation()
+            return time.perf_counter() - start, None
+        except Exception as exception:
+            return time.perf_counter() - start, exception
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=benchmark.concurrency) as executor:
+        for latency, exception in executor.map(timed_call, range(benchmark.iterations)):
+            latencies.append(latency)
+            errors += exception is not None
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'iterations': benchmark.iterations,
+        'concurrency': benchmark.concurrency,
+        'errors': errors,
+        'throughput': benchmark.iterations / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def s3_benchmarks(endpoint_url: str, injector: FaultInjector, iterations: int) -> List[Benchmark]:
+    from storage.s3 import S3Manager, MB
+
+    s3_manager = S3Manager(region_name=REGION_NAME, endpoint_url=endpoint_url, part_size=8 * MB, max_concurrency=8)
+    bucket_name = 'benchmark-bucket'
+    s3_manager.client.create_bucket(Bucket=bucket_name)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(
+            lambda index: s3_manager.client.put_object(Bucket=bucket_name, Key=f'listing/{index:05d}', Body=b'x'),
+            range(2500)
+        ))
+
+    payload = os.urandom(32 * MB)
+    s3_manager.upload_file_obj(io.BytesIO(payload), bucket_name, 'transfer/artifact.bin')
+    buffer = bytearray(len(payload))
+
+    injector.attach(s3_manager.client)
+    return [
+        Benchmark('s3.iter_objects', lambda: sum(1 for _ in s3_manager.iter_objects(bucket_name, 'listing/')), iterations),
+        Benchmark('s3.iter_objects_sharded',
+                  lambda: sum(1 for _ in s3_manager.iter_objects_sharded(bucket_name, 'listing/', shard_characters='0123456789')),
+                  iterations),
+        Benchmark('s3.upload_file_obj', lambda: s3_manager.upload_file_obj(io.BytesIO(payload), bucket_name, 'transfer/upload.bin'),
+                  max(1, iterations // 4)),
+        Benchmark('s3.download_to', lambda: s3_manager.download_to(bucket_name, 'transfer/artifact.bin', buffer),
+                  max(1, iterations // 4)),
+    ]
+
+
+def cloudwatch_benchmarks(endpoint_url: str, injector: FaultInjector, iterations: int) -> List[Benchmark]:
+    from monitoring.metric_alarm import CloudWatchAlarmCreator
+
+    alarm_creator = CloudWatchAlarmCreator(region_name=REGION_NAME, endpoint_url=endpoint_url)
+    alarms = [
+        {
+            'AlarmName': f'benchmark-alarm-{index}',
+            'MetricName': 'RunningTaskCount',
+            'Namespace': 'ECS/ContainerInsights',
+            'Statistic': 'Average',
+            'Period': 300,
+            'Threshold': 1,
+            'ComparisonOperator': 'LessThanThreshold',
+            'TreatMissingData': 'missing'
+        }
+        for index in range(200)
+    ]
+    alarm_creator.batch_put_metric_alarms(alarms, max_workers=8)
+
+    injector.attach(alarm_creator.client)
+    return [
+        Benchmark('cloudwatch.batch_put_metric_alarms.serial',
+                  lambda: alarm_creator.batch_put_metric_alarms(alarms), max(1, iterations // 4)),
+        Benchmark('cloudwatch.batch_put_metric_alarms.concurrent',
+                  lambda: alarm_creator.batch_put_metric_alarms(alarms, max_workers=16), max(1, iterations // 4)),
+        Benchmark('cloudwatch.batch_put_metric_alarms.skip_unchanged',
+                  lambda: alarm_creator.batch_put_metric_alarms(alarms, skip_unchanged=True, max_workers=16), max(1, iterations // 4)),
+    ]
+
+
+def secrets_benchmarks(endpoint_url: str, injector: FaultInjector, iterations: int) -> List[Benchmark]:
+    from security.secret_manager import SecretsManager
+
+    cached_manager = SecretsManager(region_name=REGION_NAME, endpoint_url=endpoint_url)
+    uncached_manager = SecretsManager(region_name=REGION_NAME, endpoint_url=endpoint_url, cache_ttl=0)
+    cached_manager.client.create_secret(Name='/benchmark/secret', SecretString=json.dumps({'password': 'secret'}))
+
+    injector.attach(cached_manager.client)
+    return [
+        Benchmark('secrets.get_secret.uncached', lambda: uncached_manager.get_secret('/benchmark/secret'), iterations * 10, 8),
+        Benchmark('secrets.get_secret.cached', lambda: cached_manager.get_secret('/benchmark/secret'), iterations * 10, 8),
+    ]
+
+
+def ecs_benchmarks(endpoint_url: str, injector: FaultInjector, iterations: int) -> List[Benchmark]:
+    from container.ecs import ECSManager
+
+    ecs_manager = ECSManager(region_name=REGION_NAME, endpoint_url=endpoint_url)
+    ecs_manager.client.create_cluster(clusterName='benchmark-cluster')
+    task_arns = [
+        f'arn:aws:ecs:{REGION_NAME}:123456789012:task/benchmark-cluster/{index:032x}' for index in range(300)
+    ]
+
+    injector.attach(ecs_manager.client)
+    return [
+        Benchmark('ecs.get_tasks_by_service.all_statuses',
+                  lambda: ecs_manager.get_tasks_by_service('benchmark-cluster', 'benchmark-service', desired_status=None),
+                  iterations),
+        Benchmark('ecs.describe_tasks_bulk', lambda: ecs_manager.describe_tasks_bulk('benchmark-cluster', task_arns), iterations),
+    ]
+
+
+def exec_decoding_benchmarks(iterations: int) -> List[Benchmark]:
+    from container.ecs_get_command_output import AGENT_MESSAGE_HEADER, ECSExecuteCommandOutputCatcher
+
+    catcher = ECSExecuteCommandOutputCatcher()
+    payload = b'x' * 4096
+    frames = [
+        AGENT_MESSAGE_HEADER.pack(
+            116, b'output_stream_data'.ljust(32, b'\x00'), 1, 0, sequence_num, 0, b'\x00' * 16, b'\x00' * 32, 1, len(payload)
+        ) + payload
+        for sequence_num in range(1000)
+    ]
+
+    return [
+        Benchmark('exec.decode_message.1000_frames', lambda: [catcher.decode_message(frame) for frame in frames], iterations),
+        Benchmark('exec.deserialize_message.1000_frames', lambda: [catcher.deserialize_message(frame) for frame in frames], iterations),
+    ]
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'benchmark':<52} {'throughput':>12} {'p95':>12}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        throughput_ratio = result['throughput'] / baseline[name]['throughput'] if baseline[name]['throughput'] else 0.0
+        p95_ratio = result['p95_ms'] / baseline[name]['p95_ms'] if baseline[name]['p95_ms'] else 0.0
+        print(f'{name:<52} {throughput_ratio:11.2f}x {p95_ratio:11.2f}x')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for the AWS managers')
+    parser.add_argument('--endpoint-url', help='Use an already running stand-in instead of starting moto in process')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra seconds added to every request')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--only', default='', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a JSON file written by a previous run')
+    args = parser.parse_args()
+
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+
+    injector = FaultInjector(latency=args.latency, jitter=args.jitter, throttle_rate=args.throttle_rate)
+    results = {}
+
+    with LocalStandIn(args.endpoint_url) as stand_in:
+        benchmarks = exec_decoding_benchmarks(args.iterations)
+        for factory in (s3_benchmarks, cloudwatch_benchmarks, secrets_benchmarks, ecs_benchmarks):
+            benchmarks += factory(stand_in.endpoint_url, injector, args.iterations)
+
+        print(f"{'benchmark':<52} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}")
+        for benchmark in benchmarks:
+            if args.only not in benchmark.name:
+                continue
+            result = run_benchmark(benchmark)
+            results[benchmark.name] = result
+            print(f"{benchmark.name:<52} {result['throughput']:10.2f} {result['p50_ms']:10.2f} "
+                  f"{result['p95_ms']:10.2f} {result['p99_ms']:10.2f} {result['errors']:7d}")
+
+    summary = {
+        'settings': {'latency': args.latency, 'jitter': args.jitter, 'throttle_rate': args.throttle_rate,
+                     'iterations': args.iterations, 'throttled_requests': injector.throttled},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file)['results'])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,57 +1,189 @@
-import boto3
+import copy
+import threading
+import time
+from typing import Any, Dict, List
 from botocore.exceptions import ClientError
+from utils.client_factory import get_client
+
+# Maximum number of image ids accepted by a single describe_images request
+DESCRIBE_IMAGES_BATCH_SIZE = 100
+
+
+class ECRImageIndex:
+    """
+    Índice em memória das imagens de um repositório, por tag e por digest, com TTL e atualização incremental.
+
+    As consultas retornam cópias, para que alterações do chamador não corrompam o índice. Uma consulta sem
+    resultado só lista o repositório novamente se a última atualização tiver mais de miss_refresh_interval segundos.
+    """
+
+    def __init__(self, client, repository_name: str, ttl: float = 300, miss_refresh_interval: float = 10) -> None:
+        self.client = client
+        self.repository_name = repository_name
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self.by_digest: Dict[str, Dict[str, Any]] = {}
+        self.by_tag: Dict[str, Dict[str, Any]] = {}
+        self.refreshed_at = None
+        self.lock = threading.Lock()
+
+    def is_stale(self, max_age: float = None) -> bool:
+        max_age = self.ttl if max_age is None else max_age
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= max_age
+
+    def get_by_tag(self, tag: str, max_age: float = None) -> Dict[str, Any]:
+        """
+        Busca pela tag; uma tag ausente (ex.: recém enviada) dispara uma atualização incremental antes de retornar None.
+
+        :param max_age: Idade máxima, em segundos, do índice para esta consulta (padrão: o TTL). Use um valor baixo
+                        para tags mutáveis como latest, que podem apontar para outro digest antes do TTL expirar.
+        """
+        self.refresh_if_stale(max_age)
+        image = self.by_tag.get(tag)
+        if image is None:
+            self.refresh_on_miss()
+            image = self.by_tag.get(tag)
+        return copy.deepcopy(image)
+
+    def get_by_digest(self, digest: str) -> Dict[str, Any]:
+        self.refresh_if_stale()
+        image = self.by_digest.get(digest)
+        if image is None:
+            self.refresh_on_miss()
+            image = self.by_digest.get(digest)
+        return copy.deepcopy(image)
+
+    def refresh_if_stale(self, max_age: float = None) -> None:
+        if self.is_stale(max_age):
+            with self.lock:
+                if self.is_stale(max_age):
+                    self.refresh()
+
+    def refresh_on_miss(self) -> None:
+        # Concurrent misses wait for a single refresh, and repeated misses (e.g. polling for a tag
+        # that was not pushed yet) list the repository at most once per miss_refresh_interval
+        refreshed_at = self.refreshed_at
+        with self.lock:
+            if self.refreshed_at == refreshed_at and self.is_stale(self.miss_refresh_interval):
+                self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Lista os ids das imagens (chamada leve) e descreve apenas os digests novos ou com tags alteradas,
+        descartando os que não existem mais.
+        """
+        image_tags: Dict[str, set] = {}
+        paginator = self.client.get_paginator('list_images')
+        for page in paginator.paginate(repositoryName=self.repository_name):
+            for image_id in page.get('imageIds', []):
+                tags = image_tags.setdefault(image_id['imageDigest'], set())
+                if 'imageTag' in image_id:
+                    tags.add(image_id['imageTag'])
+
+        changed_digests = [
+            digest for digest, tags in image_tags.items()
+            if digest not in self.by_digest or set(self.by_digest[digest].get('imageTags', [])) != tags
+        ]
+
+        by_digest = {digest: image for digest, image in self.by_digest.items() if digest in image_tags}
+        for image in self._describe_images(changed_digests):
+            by_digest[image['imageDigest']] = image
+
+        self.by_digest = by_digest
+        self.by_tag = {tag: image for image in by_digest.values() for tag in image.get('imageTags', [])}
+        self.refreshed_at = time.monotonic()
+
+    def _describe_images(self, digests: List[str]) -> List[Dict[str, Any]]:
+        images = []
+        for index in range(0, len(digests), DESCRIBE_IMAGES_BATCH_SIZE):
+            batch = digests[index:index + DESCRIBE_IMAGES_BATCH_SIZE]
+            response = self.client.describe_images(
+                repositoryName=self.repository_name,
+                imageIds=[{'imageDigest': digest} for digest in batch]
+            )
+            images += response.get('imageDetails', [])
+        return images
+
 
 class ECRManager:
 
-    def __init__(self, region_name='sa-east-1') -> None:
-        self.client = boto3.client('ecr', region_name=region_name)
+    def __init__(self, region_name='sa-east-1', index_ttl: float = 300, miss_refresh_interval: float = 10,
+                 endpoint_url: str = None) -> None:
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.index_ttl = index_ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self.image_indexes: Dict[str, ECRImageIndex] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def client(self):
+        return get_client('ecr', self.region_name, endpoint_url=self.endpoint_url)
 
     def list_images(self, repository_name: str, filter: dict = {'tagStatus': 'TAGGED'}) -> list:
 
         ecr_images = []
         try:
 
-            ecr_images = self.client.describe_images(
-                    repositoryName=repository_name, 
-                    filter=filter
-                )
+            paginator = self.client.get_paginator('describe_images')
+            ecr_images = {
+                'imageDetails': [
+                    image
+                    for page in paginator.paginate(repositoryName=repository_name, filter=filter)
+                    for image in page.get('imageDetails', [])
+                ]
+            }
 
         except ClientError as clientError:
             pass
         
         return ecr_images
+
+    def get_image_index(self, repository_name: str) -> ECRImageIndex:
+        with self.lock:
+            if repository_name not in self.image_indexes:
+                self.image_indexes[repository_name] = ECRImageIndex(
+                    self.client, repository_name, ttl=self.index_ttl, miss_refresh_interval=self.miss_refresh_interval
+                )
+            return self.image_indexes[repository_name]
     
-    def find_image_by_tag(self, repository_name, tag: str, filter: dict = {'tagStatus': 'TAGGED'}):
+    def find_image_by_tag(self, repository_name, tag: str, filter: dict = {'tagStatus': 'TAGGED'}, max_age: float = None):
+        """Busca a imagem pela tag no índice do repositório. O filter é mantido por compatibilidade: tags só existem em imagens TAGGED."""
         try:
             
-            ecr_images = self.list_images(repository_name=repository_name, filter=filter)
-
-            for ecr_image in ecr_images['imageDetails']:
-                if tag in ecr_image['imageTags']:
-                    return ecr_image
+            return self.get_image_index(repository_name).get_by_tag(tag, max_age)
 
         except Exception as exception:
             raise Exception(f'Failed to get latest image within repository {repository_name} by tag {tag}: {str(exception)}')
+
+    def find_image_by_digest(self, repository_name, digest: str):
+        try:
+
+            return self.get_image_index(repository_name).get_by_digest(digest)
+
+        except Exception as exception:
+            raise Exception(f'Failed to get image within repository {repository_name} by digest {digest}: {str(exception)}')
             
 # USAGE EXAMPLE
-ecr_manager = ECRManager(region_name='sa-east-1')
+if __name__ == '__main__':
+    ecr_manager = ECRManager(region_name='sa-east-1')
 
-repository_name = 'my-repository'
-images = ecr_manager.list_images(repository_name)
+    repository_name = 'my-repository'
+    images = ecr_manager.list_images(repository_name)
 
-if images.get('imageDetails'):
-    print(f"Images found in '{repository_name}':")
-    for image in images['imageDetails']:
-        print(image['imageTags'])
-else:
-    print(f"No images found in repository '{repository_name}'.")
+    if images.get('imageDetails'):
+        print(f"Images found in '{repository_name}':")
+        for image in images['imageDetails']:
+            print(image['imageTags'])
+    else:
+        print(f"No images found in repository '{repository_name}'.")
 
 
-tag_to_search = 'v1.0.0'
-image_by_tag = ecr_manager.find_image_by_tag(repository_name, tag=tag_to_search)
+    tag_to_search = 'v1.0.0'
+    image_by_tag = ecr_manager.find_image_by_tag(repository_name, tag=tag_to_search)
 
-if image_by_tag:
-    print(f"Image found with tag '{tag_to_search}':")
-    print(image_by_tag)
-else:
-    print(f"No image found with tag '{tag_to_search}'.")
+    if image_by_tag:
+        print(f"Image found with tag '{tag_to_search}':")
+        print(image_by_tag)
+    else:
+        print(f"No image found with tag '{tag_to_search}'.")
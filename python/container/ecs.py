@@ -1,66 +1,64 @@
-import boto3
+import copy
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 from botocore.exceptions import ClientError
+from utils.client_factory import get_client
+from utils.concurrency import AdaptiveConcurrencyLimiter, attach_limiter, limited_call, pool_size
+
+# Maximum number of tasks accepted by a single describe_tasks request
+DESCRIBE_TASKS_BATCH_SIZE = 100
+
+# Task definitions referenced by an explicit revision never change
+TASK_DEFINITION_REVISION = re.compile(r':\d+$')
 
 
 class ECSManager:
 
-    def __init__(self, region_name='sa-east-1') -> None:
-        self.client = boto3.client('ecs', region_name=region_name)
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None) -> None:
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.task_definition_cache: Dict[Any, Dict[str, Any]] = {}
+
+    @property
+    def client(self):
+        return get_client('ecs', self.region_name, endpoint_url=self.endpoint_url)
+
+    def list_task_arns(self, cluster_name: str, **filters) -> List[str]:
+        """Lista todos os ARNs de tasks do cluster, seguindo a paginação de list_tasks."""
+        paginator = self.client.get_paginator('list_tasks')
+
+        return [
+            task_arn
+            for page in paginator.paginate(cluster=cluster_name, PaginationConfig={'PageSize': 100}, **filters)
+            for task_arn in page.get('taskArns', [])
+        ]
+
+    def _list_tasks_by_status(self, cluster_name: str, desired_status: str, **filters) -> Dict[str, List[str]]:
+        if desired_status:
+            return {'taskArns': self.list_task_arns(cluster_name, desiredStatus=desired_status, **filters)}
+
+        desired_statuses = ['PENDING', 'RUNNING', 'STOPPED']
+        with ThreadPoolExecutor(max_workers=len(desired_statuses)) as executor:
+            task_arns = executor.map(
+                lambda status: self.list_task_arns(cluster_name, desiredStatus=status, **filters),
+                desired_statuses
+            )
+            return {'taskArns': [task_arn for status_arns in task_arns for task_arn in status_arns]}
 
     def get_tasks_by_service(self, cluster_name: str, service_name: str, desired_status: str):
         try:
-            if desired_status:
-                return self.client.list_tasks(
-                    cluster=cluster_name,
-                    serviceName=service_name,
-                    desiredStatus=desired_status,
-                    maxResults=100
-                )
-
-            desired_status = ['PENDING', 'RUNNING', 'STOPPED']
-            results = {'taskArns': []}
-            for desired_status in desired_status:
-
-                results['taskArns'] += self.client.list_tasks(
-                    cluster=cluster_name,
-                    serviceName=service_name,
-                    maxResults=100,
-                    desiredStatus=desired_status
-                ).get('taskArns', [])
-
-            return results
+            return self._list_tasks_by_status(cluster_name, desired_status, serviceName=service_name)
 
         except ClientError as exception:
-            raise Exception(f'Failed to get tasks of service {service_name}', original_exception=exception)
+            raise Exception(f'Failed to get tasks of service {service_name}: {str(exception)}')
 
     def get_tasks(self, cluster_name: str, task_definition_family: str, desired_status: str):
         try:
-
-            if desired_status:
-                return self.client.list_tasks(
-                    cluster=cluster_name,
-                    family=task_definition_family,
-                    desiredStatus=desired_status,
-                    maxResults=100
-                )
-
-            desired_status = ['PENDING', 'RUNNING', 'STOPPED']
-            results = {'taskArns': []}
-            for desired_status in desired_status:
-
-                results['taskArns'] += self.client.list_tasks(
-                    cluster=cluster_name,
-                    family=task_definition_family,
-                    maxResults=100,
-                    desiredStatus=desired_status
-                ).get('taskArns', [])
-
-            return results
+            return self._list_tasks_by_status(cluster_name, desired_status, family=task_definition_family)
 
         except ClientError as exception:
-            raise Exception(f'Failed to get tasks of family {task_definition_family}',
-                                 original_exception=exception)
+            raise Exception(f'Failed to get tasks of family {task_definition_family}: {str(exception)}')
 
     def describe_task(self, cluster_name: str, tasks: list, include=['TAGS']):
         try:
@@ -72,7 +70,33 @@ class ECSManager:
             )
 
         except ClientError as exception:
-            raise Exception(f'Failed to describe tasks {tasks}', original_exception=exception)
+            raise Exception(f'Failed to describe tasks {tasks}: {str(exception)}')
+
+    def describe_tasks_bulk(
+            self,
+            cluster_name: str,
+            tasks: list,
+            include=['TAGS'],
+            max_workers: int = 8,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> Dict[str, Any]:
+        """
+        Descreve qualquer quantidade de tasks em chamadas paralelas de até 100 ARNs, agregando tasks e failures.
+
+        Com um limiter (ex.: get_limiter('ecs')) a concorrência se adapta ao throttling em vez de usar max_workers.
+        """
+        batches = [
+            tasks[index:index + DESCRIBE_TASKS_BATCH_SIZE]
+            for index in range(0, len(tasks), DESCRIBE_TASKS_BATCH_SIZE)
+        ]
+        results = {'tasks': [], 'failures': []}
+
+        with attach_limiter(limiter, self.client), ThreadPoolExecutor(max_workers=pool_size(limiter, max_workers)) as executor:
+            for response in executor.map(lambda batch: limited_call(limiter, self.describe_task, cluster_name, batch, include), batches):
+                results['tasks'] += response.get('tasks', [])
+                results['failures'] += response.get('failures', [])
+
+        return results
 
 
     def get_services(self, cluster_name: str, service_name: str) -> Dict[str, Any]:
@@ -140,20 +164,30 @@ class ECSManager:
 
 
     def describe_task_definition(self, task_definition_name: str, include: List[str]=[]) -> Dict[str, Any]:
+        """Descreve a task definition. Revisões explícitas (family:revision ou ARN) são imutáveis e ficam em cache."""
+
+        cache_key = (task_definition_name, tuple(sorted(include)))
+        if cache_key in self.task_definition_cache:
+            return copy.deepcopy(self.task_definition_cache[cache_key])
         
         try:
             if len(include) > 0:
-                return self.client.describe_task_definition(
+                task_definition = self.client.describe_task_definition(
                     taskDefinition=task_definition_name,
                     include=include
                 ) 
-            
-            return self.client.describe_task_definition(
-                taskDefinition=task_definition_name
-            )
+            else:
+                task_definition = self.client.describe_task_definition(
+                    taskDefinition=task_definition_name
+                )
             
         except ClientError as exception:
             raise Exception(f'Error describing task definition {task_definition_name}: {str(exception)}')
+
+        if TASK_DEFINITION_REVISION.search(task_definition_name):
+            self.task_definition_cache[cache_key] = copy.deepcopy(task_definition)
+
+        return task_definition
     
 
     def list_task_definitions(self, family_prefix: str) -> List[Dict[str, Any]]:
@@ -169,6 +203,23 @@ class ECSManager:
             pass
 
         return task_definitions
+
+    def get_latest_task_definition_arn(self, family: str) -> str:
+        """Resolve o ARN da revisão mais recente da família com uma única consulta descendente."""
+        try:
+            task_definition_arns = self.client.list_task_definitions(
+                familyPrefix=family,
+                sort='DESC',
+                maxResults=1
+            ).get('taskDefinitionArns', [])
+
+        except ClientError as exception:
+            raise Exception(f'Failed to list task definitions of family {family}: {str(exception)}')
+
+        if len(task_definition_arns) == 0:
+            raise Exception(f'Task definition not found for familyPrefix {family}')
+
+        return task_definition_arns[0]
     
     def clone_last_task_definition(self, 
             image: str,
@@ -177,22 +228,17 @@ class ECSManager:
             include: List[str]=['TAGS']
         ) -> Dict[str, Any]:
 
-        try:
-
-            task_definitions = self.list_task_definitions(
-                family_prefix=task_definition
-            )
+        family = task_definition
 
-            if len(task_definitions.get('taskDefinitionArns', [])) == 0:
-                raise Exception(f'Task definition not found for familyPrefix {task_definition}')
+        try:
 
             task_definition = self.describe_task_definition(
-                task_definition_name=task_definitions['taskDefinitionArns'][-1], 
+                task_definition_name=self.get_latest_task_definition_arn(family), 
                 include=include
             )
 
             cloned_task_definition = task_definition['taskDefinition']
-            task_definition_tags = task_definition['tags']
+            task_definition_tags = task_definition.get('tags', [])
             cloned_task_definition['containerDefinitions'][0]['image'] = image
 
             for arg in remove_args:
@@ -205,7 +251,33 @@ class ECSManager:
             )
 
         except Exception as exception:
-            raise Exception(f'Failed to clone the latest task definition of family {task_definition}: {str(exception)}')
+            raise Exception(f'Failed to clone the latest task definition of family {family}: {str(exception)}')
+
+    def clone_last_task_definitions(self,
+            images: Dict[str, str],
+            remove_args: List[str],
+            include: List[str]=['TAGS'],
+            max_workers: int = 8,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> Dict[str, Dict[str, Any]]:
+        """Clona a última revisão de várias famílias em paralelo, trocando a imagem de cada uma (família -> imagem)."""
+
+        def clone(family):
+            try:
+                response = limited_call(
+                    limiter,
+                    self.clone_last_task_definition,
+                    image=images[family],
+                    task_definition=family,
+                    remove_args=remove_args,
+                    include=include
+                )
+                return family, {'status': True, 'response': response}
+            except Exception as ex:
+                return family, {'status': False, 'error': str(ex)}
+
+        with attach_limiter(limiter, self.client), ThreadPoolExecutor(max_workers=pool_size(limiter, max_workers)) as executor:
+            return dict(executor.map(clone, images))
     
     def register_task_definition(self, task_definition: Dict[str, Any], tags: Dict[str, Any]) -> str:
         
@@ -220,26 +292,31 @@ class ECSManager:
             raise Exception(f'Failed to register task definition: {str(exception)}')
         
 # USAGE EXAMPLE
-ecs_manager = ECSManager(region_name='sa-east-1')
+if __name__ == '__main__':
+    ecs_manager = ECSManager(region_name='sa-east-1')
+
+    cluster_name = 'my-cluster'
+    service_name = 'my-service'
 
-cluster_name = 'my-cluster'
-service_name = 'my-service'
+    print(f"Getting details of service '{service_name}' in cluster '{cluster_name}'...")
+    service_details = ecs_manager.get_services(cluster_name, service_name)
 
-print(f"Getting details of service '{service_name}' in cluster '{cluster_name}'...")
-service_details = ecs_manager.get_services(cluster_name, service_name)
+    print(f"Service details for '{service_name}':")
+    print(service_details)
 
-print(f"Service details for '{service_name}':")
-print(service_details)
+    running_tasks = ecs_manager.get_tasks_by_service(cluster_name, service_name, desired_status='RUNNING')
+    task_descriptions = ecs_manager.describe_tasks_bulk(cluster_name, running_tasks['taskArns'])
+    print(f"{len(task_descriptions['tasks'])} running tasks described.")
 
-new_task_definition = 'my-task-definition'
-print(f"\nUpdating service '{service_name}' with new task definition '{new_task_definition}'...")
-update_response = ecs_manager.update_service(cluster_name, service_name, new_task_definition)
+    new_task_definition = 'my-task-definition'
+    print(f"\nUpdating service '{service_name}' with new task definition '{new_task_definition}'...")
+    update_response = ecs_manager.update_service(cluster_name, service_name, new_task_definition)
 
-print(f"Service update response:")
-print(update_response)
+    print(f"Service update response:")
+    print(update_response)
 
-print(f"\nRestarting service '{service_name}'...")
-restart_response = ecs_manager.restart_service(cluster_name, service_name)
+    print(f"\nRestarting service '{service_name}'...")
+    restart_response = ecs_manager.restart_service(cluster_name, service_name)
 
-print(f"Service restart response:")
-print(restart_response)
+    print(f"Service restart response:")
+    print(restart_response)
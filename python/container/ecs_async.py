@@ -0,0 +1,208 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, NamedTuple
+from container.ecs import DESCRIBE_TASKS_BATCH_SIZE, ECSManager
+from container.ecs_get_command_output import ECSExecuteCommandOutputCatcher
+from utils.aio import AsyncManager, run_blocking
+from utils.concurrency import AdaptiveConcurrencyLimiter, attach_limiter, limited_call
+
+
+class ExecOutput(NamedTuple):
+    task: str
+    output: str
+    finished: bool = False
+    error: str = None
+
+
+class AsyncECSManager(AsyncManager):
+    """
+    Versão assíncrona do ECSManager: os mesmos métodos, como corrotinas.
+
+    Todas as instâncias compartilham o cliente boto3 (e seu pool de conexões) e o executor de utils.aio,
+    então centenas de chamadas podem ficar pendentes no event loop sem uma thread por chamada.
+    """
+
+    manager_class = ECSManager
+
+    async def describe_tasks_bulk(
+            self,
+            cluster_name: str,
+            tasks: list,
+            include=['TAGS'],
+            max_workers: int = 8,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> Dict[str, Any]:
+        """
+        Descreve qualquer quantidade de tasks em chamadas concorrentes de até 100 ARNs, agregando tasks e failures.
+
+        max_workers é aceito por compatibilidade com ECSManager e ignorado: a concorrência vem do executor compartilhado.
+        """
+        with attach_limiter(limiter, self.manager.client):
+            responses = await asyncio.gather(*(
+                self._describe_task(cluster_name, tasks[index:index + DESCRIBE_TASKS_BATCH_SIZE], include, limiter)
+                for index in range(0, len(tasks), DESCRIBE_TASKS_BATCH_SIZE)
+            ))
+
+        results = {'tasks': [], 'failures': []}
+        for response in responses:
+            results['tasks'] += response.get('tasks', [])
+            results['failures'] += response.get('failures', [])
+
+        return results
+
+    async def _describe_task(self, cluster_name: str, tasks: list, include: List[str], limiter: AdaptiveConcurrencyLimiter):
+        return await run_blocking(limited_call, limiter, self.manager.describe_task, cluster_name, tasks, include)
+
+    async def clone_last_task_definitions(
+            self,
+            images: Dict[str, str],
+            remove_args: List[str],
+            include: List[str]=['TAGS'],
+            max_workers: int = 8,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> Dict[str, Dict[str, Any]]:
+        """
+        Clona a última revisão de várias famílias concorrentemente, trocando a imagem de cada uma (família -> imagem).
+
+        max_workers é aceito por compatibilidade com ECSManager e ignorado: a concorrência vem do executor compartilhado.
+        """
+        async def clone(family):
+            try:
+                response = await run_blocking(
+                    limited_call,
+                    limiter,
+                    self.manager.clone_last_task_definition,
+                    image=images[family],
+                    task_definition=family,
+                    remove_args=remove_args,
+                    include=include
+                )
+                return family, {'status': True, 'response': response}
+            except Exception as ex:
+                return family, {'status': False, 'error': str(ex)}
+
+        with attach_limiter(limiter, self.manager.client):
+            return dict(await asyncio.gather(*(clone(family) for family in images)))
+
+    async def iter_command_output_many(
+            self,
+            cluster_name: str,
+            container_name: str,
+            command: str,
+            tasks: List[str] = None,
+            service_name: str = None,
+            max_sessions: int = 20,
+            timeout: float = 300.0,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> AsyncIterator[ExecOutput]:
+        """
+        Executa o comando em várias tasks ao mesmo tempo, gerando a saída de cada uma conforme chega.
+
+        Cada task gera um ExecOutput final com finished=True, e error preenchido se o comando falhou ou excedeu o timeout.
+
+        :param tasks: Tasks (IDs ou ARNs) alvo. Se omitido, usa as tasks do service_name.
+        :param max_sessions: Quantidade máxima de sessões de execute_command abertas ao mesmo tempo.
+        :param timeout: Tempo máximo, em segundos, de cada sessão, sem contar a espera por um consumidor lento.
+        """
+        if tasks is None:
+            if not service_name:
+                raise ValueError('Either tasks or service_name must be informed')
+            tasks = await self.list_task_arns(cluster_name, serviceName=service_name)
+
+        # Bounded, so slow consumers pause the sessions instead of buffering all of their output
+        events = asyncio.Queue(maxsize=max_sessions * 16)
+        sessions = asyncio.Semaphore(max_sessions)
+        output_catcher = ECSExecuteCommandOutputCatcher()
+
+        async def stream_output(task):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+
+            response = await asyncio.wait_for(run_blocking(
+                limited_call, limiter, self.manager.execute_command, cluster_name, task, container_name, command
+            ), timeout)
+            session = response['session']
+            output_chunks = output_catcher.iter_ecs_command_output(session['streamUrl'], session['tokenValue'])
+
+            try:
+                while True:
+                    try:
+                        output_chunk = await asyncio.wait_for(output_chunks.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        return
+
+                    # Time blocked on a slow consumer is backpressure, not session time, so it extends the deadline
+                    waiting_since = loop.time()
+                    await events.put(ExecOutput(task, output_chunk))
+                    deadline += loop.time() - waiting_since
+            finally:
+                await output_chunks.aclose()
+
+        async def run_task(task):
+            async with sessions:
+                try:
+                    await stream_output(task)
+                    await events.put(ExecOutput(task, '', finished=True))
+                except asyncio.TimeoutError:
+                    await events.put(ExecOutput(task, '', finished=True, error=f'Timed out after {timeout} seconds'))
+                except Exception as ex:
+                    await events.put(ExecOutput(task, '', finished=True, error=str(ex)))
+
+        with attach_limiter(limiter, self.manager.client):
+            workers = [asyncio.ensure_future(run_task(task)) for task in tasks]
+            remaining = len(workers)
+
+            try:
+                while remaining:
+                    event = await events.get()
+                    remaining -= event.finished
+                    yield event
+
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+    async def execute_command_many(
+            self,
+            cluster_name: str,
+            container_name: str,
+            command: str,
+            tasks: List[str] = None,
+            service_name: str = None,
+            max_sessions: int = 20,
+            timeout: float = 300.0,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> Dict[str, Dict[str, Any]]:
+        """Executa o comando em várias tasks ao mesmo tempo, retornando a saída completa e o status por task."""
+        output_chunks = {}
+        results = {}
+
+        async for event in self.iter_command_output_many(
+                cluster_name, container_name, command, tasks, service_name, max_sessions, timeout, limiter):
+            output_chunks.setdefault(event.task, []).append(event.output)
+            if event.finished:
+                results[event.task] = {
+                    'status': event.error is None,
+                    'output': ''.join(output_chunks.pop(event.task)),
+                    'error': event.error
+                }
+
+        return results
+
+
+# USAGE EXAMPLE
+if __name__ == '__main__':
+    async def main():
+        ecs_manager = AsyncECSManager(region_name='sa-east-1')
+        clusters = ['cluster-01', 'cluster-02', 'cluster-03']
+
+        task_arns = await asyncio.gather(*(ecs_manager.list_task_arns(cluster) for cluster in clusters))
+        for cluster, arns in zip(clusters, task_arns):
+            print(cluster, (await ecs_manager.describe_tasks_bulk(cluster, arns))['tasks'])
+
+        # Run a diagnostic command on every task of a service, printing each task's output as it arrives
+        async for event in ecs_manager.iter_command_output_many(
+                'cluster-01', 'app', 'df -h', service_name='service-01', max_sessions=50, timeout=60):
+            print(f'[{event.task}] {event.error or event.output}', end='' if not event.finished else '\n')
+
+    asyncio.run(main())
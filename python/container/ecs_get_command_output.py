@@ -1,7 +1,22 @@
+import codecs
 import json
+import struct
 import websockets
 import uuid
 import datetime
+from typing import AsyncIterator, NamedTuple, Union
+
+# Agent message header, see deserialize_message for the reference layout:
+# HeaderLength, MessageType, SchemaVersion, CreatedDate, SequenceNumber, Flags, MessageId, PayloadDigest, PayloadType, PayloadLength
+AGENT_MESSAGE_HEADER = struct.Struct('>I32sIQqQ16s32sII')
+OUTPUT_PAYLOAD_TYPE = 1
+
+
+class AgentMessage(NamedTuple):
+    message_type: str
+    sequence_num: int
+    payload_type: int
+    payload: memoryview
 
 
 class ECSExecuteCommandOutputCatcher:
@@ -12,64 +27,81 @@ class ECSExecuteCommandOutputCatcher:
             # https://github.com/boto/boto3/issues/3496
             # https://github.com/theherk/interloper/issues/1
         """
-        total_payload_message = ''
-        already_seen = set()
+        output_chunks = []
 
         try:
-            async with websockets.connect(session_url) as connection:
+            async for output_chunk in self.iter_ecs_command_output(session_url, token_value):
+                output_chunks.append(output_chunk)
+
+        except Exception as e:
+            print(f"Failed to catch output through WebSocket: {e}")
+
+        return ''.join(output_chunks)
+
+    async def iter_ecs_command_output(self, session_url: str, token_value: str) -> AsyncIterator[str]:
+        """Gera os trechos de saída do comando conforme chegam pelo WebSocket, sem acumular a saída completa."""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        already_seen = set()
+
+        async with websockets.connect(session_url) as connection:
 
-                print(f'Starting connection with WebSocket: {session_url}')
+            print(f'Starting connection with WebSocket: {session_url}')
 
-                init_payload = {
-                    "MessageSchemaVersion": "1.0",
-                    "RequestId": str(uuid.uuid4()),
-                    "TokenValue": token_value
-                }
+            init_payload = {
+                "MessageSchemaVersion": "1.0",
+                "RequestId": str(uuid.uuid4()),
+                "TokenValue": token_value
+            }
 
-                await connection.send(json.dumps(init_payload))
+            await connection.send(json.dumps(init_payload))
 
+            try:
                 while True:
 
                     response = await connection.recv()
 
-                    deserialized_message = self.deserialize_message(response)
+                    agent_message = self.decode_message(response)
 
-                    if not deserialized_message:
+                    if not agent_message:
                         break
 
                     # Stream starts with this message, does not have to be ack
-                    if deserialized_message['message_type'] == 'start_publication':
+                    if agent_message.message_type == 'start_publication':
                         continue
 
                     # Break if this message is received
-                    if deserialized_message['message_type'] == 'channel_closed':
+                    if agent_message.message_type == 'channel_closed':
                         break
 
-                    # Process payload if it's output of our command
-                    if deserialized_message['payload_type'] == 1:
-                        payload_message = deserialized_message['payload']
-                        if payload_message not in already_seen:
-                            already_seen.add(payload_message)
-                            total_payload_message += payload_message
+                    # Process payload if it's output of our command, messages can be redelivered until acknowledged
+                    if agent_message.payload_type == OUTPUT_PAYLOAD_TYPE and agent_message.sequence_num not in already_seen:
+                        already_seen.add(agent_message.sequence_num)
+                        output_chunk = decoder.decode(agent_message.payload)
+                        if output_chunk:
+                            yield output_chunk
 
-                    connection.send(self.create_ack_message(deserialized_message))
+                    await connection.send(self.create_ack_message(agent_message))
 
-        except Exception as e:
-            print(f"Failed to catch output through WebSocket: {e}")
-        finally:
-            print('Closing connection...')
-            await connection.close()
+                output_chunk = decoder.decode(b'', final=True)
+                if output_chunk:
+                    yield output_chunk
+
+            finally:
+                print('Closing connection...')
 
-        return total_payload_message
+    def create_ack_message(self, deserialized_message: Union[AgentMessage, dict]) -> bytes:
 
-    def create_ack_message(self, deserialized_message):
+        if isinstance(deserialized_message, AgentMessage):
+            sequence_num = deserialized_message.sequence_num
+        else:
+            sequence_num = deserialized_message['sequence_num']
 
         ack_message_type = "acknowledge"
         ack_buffer = (len(ack_message_type)).to_bytes(4, "big")
         ack_buffer += ack_message_type.encode('utf-8').ljust(32, b'\x00')
         ack_buffer += (1).to_bytes(4, "big")
         ack_buffer += int(datetime.datetime.now().timestamp()).to_bytes(8, "big")
-        ack_buffer += deserialized_message['sequence_num'].to_bytes(8, "big")
+        ack_buffer += sequence_num.to_bytes(8, "big")
         ack_buffer += (1).to_bytes(8, "big")
         ack_buffer += uuid.uuid4().bytes
         ack_buffer += (2).to_bytes(4, "big")
@@ -78,41 +110,65 @@ class ECSExecuteCommandOutputCatcher:
 
         return ack_buffer
 
+    def decode_message(self, response: Union[bytes, bytearray, memoryview]) -> AgentMessage:
+        """Decodifica o cabeçalho com struct e expõe o payload como memoryview, sem copiar os bytes."""
+        if len(response) == 0:
+            return None
+        elif len(response) < AGENT_MESSAGE_HEADER.size:
+            raise Exception('Cannot deserialize message')
+
+        buffer = memoryview(response)
+        (_, message_type, _, _, sequence_num, _, _, _,
+         payload_type, payload_length) = AGENT_MESSAGE_HEADER.unpack_from(buffer)
+
+        payload_end = AGENT_MESSAGE_HEADER.size + payload_length if payload_length else len(buffer)
+
+        return AgentMessage(
+            message_type=message_type.rstrip(b'\x00').decode('utf-8'),
+            sequence_num=sequence_num,
+            payload_type=payload_type,
+            payload=buffer[AGENT_MESSAGE_HEADER.size:payload_end]
+        )
+
     def deserialize_message(self, response):
         """
         # Refer to the link below for structure and validation
         # https://github.com/aws/amazon-ssm-agent/blob/mainline/agent/session/contracts/agentmessage.go
         """
-        response_length = len(response)
+        agent_message = self.decode_message(response)
 
-        if response_length == 0:
+        if agent_message is None:
             return None
-        elif response_length < 120:
-            raise Exception('Cannot deserialize message')
 
         return {
-            "message_type": response[4:36].decode("utf-8").strip('\x00'),
-            "sequence_num": int.from_bytes(response[48:56], byteorder="big"),
-            "payload_type": int.from_bytes(response[112:116], byteorder="big"),
-            "payload": response[120:].decode('utf-8')
+            "message_type": agent_message.message_type,
+            "sequence_num": agent_message.sequence_num,
+            "payload_type": agent_message.payload_type,
+            "payload": str(agent_message.payload, 'utf-8')
         }
     
 # USAGE EXAMPLE
-import asyncio
+if __name__ == '__main__':
+    import asyncio
 
-# Session URL and token value, which you would typically get from the ECS service
-session_url = 'wss://example-ecs-session-url.com/socket'
-token_value = 'example-token-value'
+    # Session URL and token value, which you would typically get from the ECS service
+    session_url = 'wss://example-ecs-session-url.com/socket'
+    token_value = 'example-token-value'
 
-# Instantiate the ECSExecuteCommandOutputCatcher class
-catcher = ECSExecuteCommandOutputCatcher()
+    # Instantiate the ECSExecuteCommandOutputCatcher class
+    catcher = ECSExecuteCommandOutputCatcher()
 
-# Asynchronously process ECS command output through the WebSocket connection
-async def process_output():
-    total_output = await catcher.process_ecs_command_output(session_url, token_value)
+    # Asynchronously process ECS command output through the WebSocket connection
+    async def process_output():
+        total_output = await catcher.process_ecs_command_output(session_url, token_value)
     
-    # Print the captured output
-    print(f"Captured ECS Command Output: {total_output}")
+        # Print the captured output
+        print(f"Captured ECS Command Output: {total_output}")
+
+    # Or stream the output chunks as they arrive
+    async def stream_output():
+        async for output_chunk in catcher.iter_ecs_command_output(session_url, token_value):
+            print(output_chunk, end='')
 
-# Run the async function using asyncio event loop
-asyncio.run(process_output())
+    # Run the async function using asyncio event loop
+    asyncio.run(process_output())
@@ -1,10 +1,25 @@
-import boto3
+import json
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
+from utils.client_factory import get_client
+from utils.concurrency import AdaptiveConcurrencyLimiter, attach_limiter, limited_call, pool_size
+
+# API limits: put_targets accepts 10 targets and remove_targets 100 ids per call
+PUT_TARGETS_BATCH_SIZE = 10
+REMOVE_TARGETS_BATCH_SIZE = 100
+
+# Rule attributes compared by sync_rules
+RULE_FIELDS = ['ScheduleExpression', 'EventPattern', 'State', 'Description', 'RoleArn']
 
 
 class EventBridgeManager:
-    def __init__(self, region_name='sa-east-1'):
-        self.client = boto3.client('events', region_name=region_name)
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None):
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+
+    @property
+    def client(self):
+        return get_client('events', self.region_name, endpoint_url=self.endpoint_url)
 
     def get_scheduler_rule_by_name(self, rule_name: str) -> dict:
         try:
@@ -19,8 +34,12 @@ class EventBridgeManager:
             
     def get_targets_for_rule(self, rule_name):
         try:
-            response = self.client.list_targets_by_rule(Rule=rule_name)
-            return response.get('Targets', [])
+            paginator = self.client.get_paginator('list_targets_by_rule')
+            return [
+                target
+                for page in paginator.paginate(Rule=rule_name)
+                for target in page.get('Targets', [])
+            ]
         
         except ClientError as exception:
             if exception.response['Error']['Code'] == 'ResourceNotFoundException':
@@ -32,13 +51,124 @@ class EventBridgeManager:
     def update_targets(self, rule_name: str, targets: list):
 
         try:
-            return self.client.put_targets(
-                Rule=rule_name,
-                Targets=targets
-            )
+            results = {'FailedEntryCount': 0, 'FailedEntries': []}
+            for index in range(0, len(targets), PUT_TARGETS_BATCH_SIZE):
+                response = self.client.put_targets(
+                    Rule=rule_name,
+                    Targets=targets[index:index + PUT_TARGETS_BATCH_SIZE]
+                )
+                results['FailedEntryCount'] += response.get('FailedEntryCount', 0)
+                results['FailedEntries'] += response.get('FailedEntries', [])
+            return results
         except ClientError as exception:
             raise Exception(f'Failed to put targets for rule: {rule_name}', exception)
+
+    def remove_targets(self, rule_name: str, target_ids: list):
+
+        try:
+            results = {'FailedEntryCount': 0, 'FailedEntries': []}
+            for index in range(0, len(target_ids), REMOVE_TARGETS_BATCH_SIZE):
+                response = self.client.remove_targets(
+                    Rule=rule_name,
+                    Ids=target_ids[index:index + REMOVE_TARGETS_BATCH_SIZE]
+                )
+                results['FailedEntryCount'] += response.get('FailedEntryCount', 0)
+                results['FailedEntries'] += response.get('FailedEntries', [])
+            return results
+        except ClientError as exception:
+            raise Exception(f'Failed to remove targets for rule: {rule_name}', exception)
+
+    def list_rules(self, name_prefix: str = None) -> dict:
+        """Lista todas as regras do event bus padrão, seguindo a paginação, indexadas por nome."""
+        try:
+            paginator = self.client.get_paginator('list_rules')
+            pagination_args = {'NamePrefix': name_prefix} if name_prefix else {}
+            return {
+                rule['Name']: rule
+                for page in paginator.paginate(**pagination_args)
+                for rule in page.get('Rules', [])
+            }
+        except ClientError as exception:
+            raise Exception(f'Failed to list rules', exception)
+
+    def sync_rules(
+            self,
+            desired_state: dict,
+            name_prefix: str = None,
+            max_workers: int = 8,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ) -> dict:
+        """
+        Sincroniza regras e targets com o estado desejado, emitindo apenas as chamadas necessárias.
+
+        :param desired_state: Dicionário por nome da regra com os atributos do put_rule
+                              (ScheduleExpression, EventPattern, State, Description, RoleArn) e a lista 'Targets'.
+        :param name_prefix: Restringe a listagem das regras existentes a este prefixo.
+        :param limiter: Limitador adaptativo (ex.: get_limiter('events')) que ajusta a concorrência ao throttling;
+                        as novas tentativas ficam a cargo do botocore e uma regra que ainda falhar é reportada com status False.
+        :return: Dicionário por nome da regra com o status da sincronização.
+        """
+        existing_rules = self.list_rules(name_prefix)
+
+        def sync_rule(rule_name):
+            try:
+                return rule_name, limited_call(
+                    limiter, self._sync_rule, rule_name, desired_state[rule_name], existing_rules.get(rule_name)
+                )
+            except Exception as ex:
+                return rule_name, {'status': False, 'error': str(ex)}
+
+        with attach_limiter(limiter, self.client), ThreadPoolExecutor(max_workers=pool_size(limiter, max_workers)) as executor:
+            return dict(executor.map(sync_rule, desired_state))
+
+    def _sync_rule(self, rule_name: str, desired_rule: dict, existing_rule: dict) -> dict:
+        status = {'status': True, 'rule': 'unchanged', 'put_targets': 0, 'removed_targets': 0, 'failed_entries': []}
+        desired_fields = {field: desired_rule[field] for field in RULE_FIELDS if field in desired_rule}
+
+        if existing_rule is None or any(
+                self._normalize_rule_field(field, existing_rule.get(field)) != self._normalize_rule_field(field, value)
+                for field, value in desired_fields.items()
+            ):
+            try:
+                self.client.put_rule(Name=rule_name, **desired_fields)
+            except ClientError as exception:
+                raise Exception(f'Failed to update rule for rule: {rule_name}', exception)
+            status['rule'] = 'created' if existing_rule is None else 'updated'
+
+        existing_targets = {} if existing_rule is None else {
+            target['Id']: target for target in self.get_targets_for_rule(rule_name)
+        }
+        desired_targets = {target['Id']: target for target in desired_rule.get('Targets', [])}
+
+        changed_targets = [
+            target for target_id, target in desired_targets.items()
+            if existing_targets.get(target_id) != target
+        ]
+        removed_target_ids = [target_id for target_id in existing_targets if target_id not in desired_targets]
+
+        if changed_targets:
+            response = self.update_targets(rule_name, changed_targets)
+            status['put_targets'] = len(changed_targets) - response['FailedEntryCount']
+            status['failed_entries'] += response['FailedEntries']
+
+        if removed_target_ids:
+            response = self.remove_targets(rule_name, removed_target_ids)
+            status['removed_targets'] = len(removed_target_ids) - response['FailedEntryCount']
+            status['failed_entries'] += response['FailedEntries']
+
+        status['status'] = not status['failed_entries']
+        return status
         
+    @staticmethod
+    def _normalize_rule_field(field, value):
+        # Equivalent patterns may differ in key order or whitespace, so they are compared as parsed JSON
+        if field == 'EventPattern' and isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value
+        return value
+
     def update_rule(self, rule_name: str, schedule_expression: str, state: str) -> dict:
         try:
         
@@ -52,46 +182,57 @@ class EventBridgeManager:
             raise Exception(f'Failed to update rule for rule: {rule_name}', exception)
         
 # USAGE EXAMPLE
-region = 'us-west-2'  
-eventbridge_manager = EventBridgeManager(region)
+if __name__ == '__main__':
+    region = 'us-west-2'  
+    eventbridge_manager = EventBridgeManager(region)
 
-rule_name = 'my-scheduled-rule'
+    rule_name = 'my-scheduled-rule'
 
-rule = eventbridge_manager.get_scheduler_rule_by_name(rule_name)
-if rule:
-    print(f"Rule found: {rule}")
-else:
-    print(f"Rule {rule_name} not found.")
+    rule = eventbridge_manager.get_scheduler_rule_by_name(rule_name)
+    if rule:
+        print(f"Rule found: {rule}")
+    else:
+        print(f"Rule {rule_name} not found.")
 
 
-targets = eventbridge_manager.get_targets_for_rule(rule_name)
-if targets:
-    print(f"Targets for {rule_name}: {targets}")
-else:
-    print(f"No targets found for rule {rule_name}.")
+    targets = eventbridge_manager.get_targets_for_rule(rule_name)
+    if targets:
+        print(f"Targets for {rule_name}: {targets}")
+    else:
+        print(f"No targets found for rule {rule_name}.")
 
 
-new_schedule_expression = 'rate(5 minutes)' 
-new_state = 'ENABLED'
-updated_rule = eventbridge_manager.update_rule(rule_name, new_schedule_expression, new_state)
-print(f"Updated rule: {updated_rule}")
+    new_schedule_expression = 'rate(5 minutes)' 
+    new_state = 'ENABLED'
+    updated_rule = eventbridge_manager.update_rule(rule_name, new_schedule_expression, new_state)
+    print(f"Updated rule: {updated_rule}")
 
 
-new_targets = [
-    {
-        'Id': 'new-target-1',
-        'Arn': 'arn:aws:lambda:us-west-2:123456789012:function:my-lambda-function',
-        'Input': '{"key": "value"}'
-    },
-    {
-        'Id': 'new-target-2',
-        'Arn': 'arn:aws:sqs:us-west-2:123456789012:my-queue',
-        'Input': '{"queueKey": "queueValue"}'
-    }
-]
+    new_targets = [
+        {
+            'Id': 'new-target-1',
+            'Arn': 'arn:aws:lambda:us-west-2:123456789012:function:my-lambda-function',
+            'Input': '{"key": "value"}'
+        },
+        {
+            'Id': 'new-target-2',
+            'Arn': 'arn:aws:sqs:us-west-2:123456789012:my-queue',
+            'Input': '{"queueKey": "queueValue"}'
+        }
+    ]
+
+    try:
+        eventbridge_manager.update_targets(rule_name, new_targets)
+        print(f"Successfully updated targets for rule: {rule_name}")
+    except Exception as e:
+        print(f"Error updating targets: {str(e)}")
 
-try:
-    eventbridge_manager.update_targets(rule_name, new_targets)
-    print(f"Successfully updated targets for rule: {rule_name}")
-except Exception as e:
-    print(f"Error updating targets: {str(e)}")
+    desired_state = {
+        rule_name: {
+            'ScheduleExpression': 'rate(5 minutes)',
+            'State': 'ENABLED',
+            'Targets': new_targets
+        }
+    }
+    sync_status = eventbridge_manager.sync_rules(desired_state)
+    print(f"Sync status: {sync_status}")
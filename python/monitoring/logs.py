@@ -1,17 +1,34 @@
-import boto3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
 from botocore.exceptions import ClientError
+from utils.client_factory import get_client
+from utils.concurrency import PageChannel
+
+# put_log_events limits: https://docs.aws.amazon.com/AmazonCloudWatchLogs/latest/APIReference/API_PutLogEvents.html
+MAX_BATCH_EVENTS = 10000
+MAX_BATCH_BYTES = 1048576
+EVENT_OVERHEAD_BYTES = 26
+MAX_BATCH_SPAN_MS = 24 * 60 * 60 * 1000
+MAX_EVENT_AGE_MS = 14 * 24 * 60 * 60 * 1000
+MAX_EVENT_FUTURE_MS = 2 * 60 * 60 * 1000
 
 class CloudWatchLogCreator:
     
-    def __init__(self, region_name='sa-east-1'):
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None):
         self.region_name = region_name
-        self.client = boto3.client('cloudwatch', region_name=region_name)
-    
+        self.endpoint_url = endpoint_url
+
+    @property
+    def client(self):
+        return get_client('logs', self.region_name, endpoint_url=self.endpoint_url)
+
     def create_log_group(self, log_group_name: str, retention_in_days: int) -> None:
         """Cria um grupo de logs se não existir."""
         try:
             self.client.create_log_group(logGroupName=log_group_name)
-            self.logger.info(f'Log group {log_group_name} created.')
+            print(f'Log group {log_group_name} created.')
 
             if retention_in_days > 0:
                 self.client.put_retention_policy(
@@ -37,9 +54,245 @@ class CloudWatchLogCreator:
             else:
                 raise Exception(f'Failed to create log stream: {str(e)}')
 
+
+class CloudWatchLogShipper:
+    """
+    Envia eventos de log em lotes via put_log_events a partir de uma thread em segundo plano.
+
+    Eventos podem ser adicionados por várias threads. O envio acontece quando o buffer atinge batch_events
+    ou quando o evento mais antigo passa de flush_interval segundos. Com o buffer cheio, put bloqueia o chamador.
+    """
+
+    def __init__(self, log_creator: CloudWatchLogCreator, log_group_name: str, log_stream_name: str,
+                 max_buffer_events: int = 100000, batch_events: int = MAX_BATCH_EVENTS, flush_interval: float = 5.0):
+        self.client = log_creator.client
+        self.log_group_name = log_group_name
+        self.log_stream_name = log_stream_name
+        self.max_buffer_events = max_buffer_events
+        self.batch_events = min(batch_events, MAX_BATCH_EVENTS)
+        self.flush_interval = flush_interval
+
+        self.buffer: List[Dict[str, Any]] = []
+        self.oldest_event_at = None
+        self.closed = False
+        self.condition = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.stats = {'sent': 0, 'dropped': 0, 'rejected': 0, 'failed_batches': 0}
+
+        self.worker = threading.Thread(target=self._run, name=f'log-shipper-{log_stream_name}', daemon=True)
+        self.worker.start()
+
+    def put(self, message: str, timestamp: int = None, timeout: float = None) -> bool:
+        """Adiciona um evento ao buffer. Retorna False se o buffer continuar cheio após timeout segundos."""
+        event = {'timestamp': timestamp if timestamp is not None else int(time.time() * 1000), 'message': message}
+
+        with self.condition:
+            if self.closed:
+                raise Exception(f'Log shipper for {self.log_group_name}/{self.log_stream_name} is closed')
+
+            if not self.condition.wait_for(lambda: len(self.buffer) < self.max_buffer_events or self.closed, timeout):
+                return False
+
+            if self.closed:
+                raise Exception(f'Log shipper for {self.log_group_name}/{self.log_stream_name} is closed')
+
+            if not self.buffer:
+                self.oldest_event_at = time.monotonic()
+            self.buffer.append(event)
+
+            if len(self.buffer) >= self.batch_events:
+                self.condition.notify_all()
+
+        return True
+
+    def flush(self) -> None:
+        """Envia imediatamente todos os eventos do buffer."""
+        with self.condition:
+            events = self._take_buffer()
+        self._send(events)
+
+    def close(self) -> None:
+        """Envia os eventos pendentes e encerra a thread de envio."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        self.flush()
+
+    def _take_buffer(self) -> List[Dict[str, Any]]:
+        events, self.buffer = self.buffer, []
+        self.oldest_event_at = None
+        self.condition.notify_all()
+        return events
+
+    def _should_flush(self) -> bool:
+        if self.closed or len(self.buffer) >= self.batch_events:
+            return True
+        return self.oldest_event_at is not None and time.monotonic() - self.oldest_event_at >= self.flush_interval
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while not self._should_flush():
+                    waiting = self.flush_interval
+                    if self.oldest_event_at is not None:
+                        waiting = max(0.0, self.flush_interval - (time.monotonic() - self.oldest_event_at))
+                    self.condition.wait(waiting)
+
+                closed = self.closed
+                events = self._take_buffer()
+
+            try:
+                self._send(events)
+            except Exception as e:
+                self.stats['failed_batches'] += 1
+                self.stats['dropped'] += len(events)
+                print(f'Failed to ship {len(events)} log events to {self.log_stream_name}: {str(e)}')
+
+            if closed:
+                return
+
+    def _send(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+
+        # Events inside a batch must be in chronological order
+        events.sort(key=lambda event: event['timestamp'])
+
+        with self.send_lock:
+            for batch in self._build_batches(events):
+                try:
+                    response = self.client.put_log_events(
+                        logGroupName=self.log_group_name,
+                        logStreamName=self.log_stream_name,
+                        logEvents=batch
+                    )
+                    rejected = self._count_rejected(response.get('rejectedLogEventsInfo', {}), len(batch))
+                    self.stats['rejected'] += rejected
+                    self.stats['sent'] += len(batch) - rejected
+
+                except Exception as e:
+                    # Connection and timeout errors are not ClientError; the worker must survive them too
+                    self.stats['failed_batches'] += 1
+                    self.stats['dropped'] += len(batch)
+                    print(f'Failed to put {len(batch)} log events to {self.log_stream_name}: {str(e)}')
+
+    def _build_batches(self, events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        now = int(time.time() * 1000)
+        batches = []
+        batch, batch_bytes = [], 0
+
+        for event in events:
+            if event['timestamp'] < now - MAX_EVENT_AGE_MS or event['timestamp'] > now + MAX_EVENT_FUTURE_MS:
+                self.stats['dropped'] += 1
+                continue
+
+            event_bytes = len(event['message'].encode('utf-8')) + EVENT_OVERHEAD_BYTES
+            if batch and (
+                len(batch) >= self.batch_events
+                or batch_bytes + event_bytes > MAX_BATCH_BYTES
+                or event['timestamp'] - batch[0]['timestamp'] > MAX_BATCH_SPAN_MS
+            ):
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+
+            batch.append(event)
+            batch_bytes += event_bytes
+
+        if batch:
+            batches.append(batch)
+
+        return batches
+
+    @staticmethod
+    def _count_rejected(rejected_info: Dict[str, int], batch_size: int) -> int:
+        # Too old and expired events are a prefix of the batch, too new events are a suffix
+        rejected = max(rejected_info.get('tooOldLogEventEndIndex', 0), rejected_info.get('expiredLogEventEndIndex', 0))
+        if 'tooNewLogEventStartIndex' in rejected_info:
+            rejected += batch_size - rejected_info['tooNewLogEventStartIndex']
+        return min(rejected, batch_size)
+
+
+class CloudWatchLogReader:
+    """
+    Lê eventos de um grupo de logs dividindo o intervalo de tempo em fatias consultadas em paralelo via filter_log_events.
+
+    Os eventos são gerados em ordem de (timestamp, eventId): as fatias são disjuntas e consumidas em ordem, e os
+    eventos de cada fatia são ordenados antes de serem entregues, pois a API não os ordena entre streams.
+    Cada worker mantém no máximo uma fatia em memória; mais fatias reduzem o tamanho de cada uma.
+    """
+
+    def __init__(self, log_creator: CloudWatchLogCreator, max_concurrency: int = 8):
+        self.client = log_creator.client
+        self.max_concurrency = max(1, max_concurrency)
+
+    def iter_log_events(self, log_group_name: str, start_time: int, end_time: int, filter_pattern: str = None,
+                        log_stream_names: List[str] = None, slices: int = None) -> Iterator[Dict[str, Any]]:
+        """
+        Gera os eventos entre start_time e end_time (epoch em milissegundos, ambos inclusivos).
+
+        :param slices: Quantidade de fatias; o padrão é 4 por worker, para equilibrar fatias com volumes diferentes.
+        """
+        time_slices = self._slices(start_time, end_time, slices or self.max_concurrency * 4)
+        filter_args = {'logGroupName': log_group_name}
+        if filter_pattern:
+            filter_args['filterPattern'] = filter_pattern
+        if log_stream_names:
+            filter_args['logStreamNames'] = log_stream_names
+
+        stopped = threading.Event()
+        channels = [PageChannel(1, stopped) for _ in time_slices]
+
+        # Slices are submitted in order, so the slice being consumed is always among the ones being read
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for channel, (slice_start, slice_end) in zip(channels, time_slices):
+                executor.submit(
+                    channel.produce,
+                    self._iter_slice_events(slice_start, slice_end, filter_args),
+                    f'filter log events between {slice_start} and {slice_end}'
+                )
+
+            try:
+                for channel in channels:
+                    yield from channel.consume()
+            finally:
+                stopped.set()
+
+    def _iter_slice_events(self, slice_start: int, slice_end: int, filter_args: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        # Pages interleave events from different streams, so the whole slice is sorted before it is handed over
+        events = []
+        paginator = self.client.get_paginator('filter_log_events')
+        for page in paginator.paginate(startTime=slice_start, endTime=slice_end, **filter_args):
+            events.extend(page.get('events', []))
+        events.sort(key=lambda event: (event['timestamp'], event.get('eventId', '')))
+        yield events
+
+    @staticmethod
+    def _slices(start_time: int, end_time: int, slices: int) -> List[Tuple[int, int]]:
+        # filter_log_events treats both bounds as inclusive, so consecutive slices must not share a millisecond
+        slice_duration = max(1, -(-(end_time - start_time + 1) // slices))
+        return [
+            (slice_start, min(slice_start + slice_duration - 1, end_time))
+            for slice_start in range(start_time, end_time + 1, slice_duration)
+        ]
+
+
 # USAGE EXAMPLE
+if __name__ == '__main__':
+
+    cw_log_creator = CloudWatchLogCreator(region_name='sa-east-1')
+
+    cw_log_creator.create_log_group('My-log-group', 7)
+    cw_log_creator.create_log_stream('My-log-group', 'log-stream')
 
-cw_log_creator = CloudWatchLogCreator(region_name='sa-east-1')
+    log_shipper = CloudWatchLogShipper(cw_log_creator, 'My-log-group', 'log-stream', flush_interval=2.0)
+    for index in range(1000):
+        log_shipper.put(f'event {index}')
+    log_shipper.close()
+    print(f'Log shipper stats: {log_shipper.stats}')
 
-cw_log_creator.create_log_group('My-log-group', 7)
-cw_log_creator.create_log_stream('My-log-group', 'log-stream')
+    # Read the last six hours back in timestamp order, twelve slices at a time
+    log_reader = CloudWatchLogReader(cw_log_creator, max_concurrency=12)
+    now = int(time.time() * 1000)
+    for event in log_reader.iter_log_events('My-log-group', now - 6 * 60 * 60 * 1000, now, filter_pattern='ERROR'):
+        print(event['timestamp'], event['message'])
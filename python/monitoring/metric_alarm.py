@@ -1,80 +1,179 @@
-import boto3
+from concurrent.futures import ThreadPoolExecutor
+from utils.client_factory import get_client
+from utils.concurrency import AdaptiveConcurrencyLimiter, attach_limiter, limited_call, pool_size
+
+# Maximum number of alarm names accepted by a single describe_alarms request
+DESCRIBE_ALARMS_BATCH_SIZE = 100
+
+# Fields returned by describe_alarms that fully define a metric alarm (Tags are not returned, so they are not compared)
+ALARM_DEFINITION_FIELDS = [
+    'AlarmDescription', 'ActionsEnabled', 'OKActions', 'AlarmActions', 'InsufficientDataActions',
+    'MetricName', 'Namespace', 'Statistic', 'Dimensions', 'Period', 'EvaluationPeriods',
+    'DatapointsToAlarm', 'Threshold', 'ComparisonOperator', 'TreatMissingData'
+]
 
 class CloudWatchAlarmCreator:
-    def __init__(self, region_name='sa-east-1'):
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None):
         self.region_name = region_name
-        self.client = boto3.client('cloudwatch', region_name=region_name)
+        self.endpoint_url = endpoint_url
+
+    @property
+    def client(self):
+        return get_client('cloudwatch', self.region_name, endpoint_url=self.endpoint_url)
+
+    def build_alarm_args(self, alarm_dict):
+        return dict(
+            AlarmName=alarm_dict.get('AlarmName', ''),
+            AlarmDescription=alarm_dict.get('AlarmDescription', ''),
+            ActionsEnabled=alarm_dict.get('ActionsEnabled', False),
+            OKActions=alarm_dict.get('OKActions', []),
+            AlarmActions=alarm_dict.get('AlarmActions', []),
+            InsufficientDataActions=alarm_dict.get('InsufficientDataActions', []),
+            MetricName=alarm_dict.get('MetricName', ''),
+            Namespace=alarm_dict.get('Namespace', ''),
+            Statistic=alarm_dict.get('Statistic', ''),
+            Dimensions=alarm_dict.get('Dimensions', []),
+            Period=alarm_dict.get('Period', 1),
+            EvaluationPeriods=alarm_dict.get('EvaluationPeriods', 1),
+            DatapointsToAlarm=alarm_dict.get('DatapointsToAlarm', 1),
+            Threshold=alarm_dict.get('Threshold', 100.0),
+            ComparisonOperator=alarm_dict.get('ComparisonOperator', 'GreaterThanOrEqualToThreshold'),
+            TreatMissingData=alarm_dict.get('TreatMissingData', ''),
+            Tags=alarm_dict.get('Tags', [])
+        )
 
     def put_metric_alarm(self, alarm_dict):
         try:
-            return self.client.put_metric_alarm(
-                AlarmName=alarm_dict.get('AlarmName', ''),
-                AlarmDescription=alarm_dict.get('AlarmDescription', ''),
-                ActionsEnabled=alarm_dict.get('ActionsEnabled', False),
-                OKActions=alarm_dict.get('OKActions', []),
-                AlarmActions=alarm_dict.get('AlarmActions', []),
-                InsufficientDataActions=alarm_dict.get('InsufficientDataActions', []),
-                MetricName=alarm_dict.get('MetricName', ''),
-                Namespace=alarm_dict.get('Namespace', ''),
-                Statistic=alarm_dict.get('Statistic', ''),
-                Dimensions=alarm_dict.get('Dimensions', []),
-                Period=alarm_dict.get('Period', 1),
-                EvaluationPeriods=alarm_dict.get('EvaluationPeriods', 1),
-                DatapointsToAlarm=alarm_dict.get('DatapointsToAlarm', 1),
-                Threshold=alarm_dict.get('Threshold', 100.0),
-                ComparisonOperator=alarm_dict.get('ComparisonOperator', 'GreaterThanOrEqualToThreshold'),
-                TreatMissingData=alarm_dict.get('TreatMissingData', ''),
-                Tags=alarm_dict.get('Tags', [])
-            )
+            return self.client.put_metric_alarm(**self.build_alarm_args(alarm_dict))
         except Exception as ex:
             raise Exception(f"Failed to create metric_alarm {alarm_dict.get('AlarmName', '')}: {str(ex)}")
 
-    def batch_put_metric_alarms(self, alarms: list):
-        
+    def describe_alarms(self, alarm_names: list, max_workers: int = 1, limiter: AdaptiveConcurrencyLimiter = None) -> dict:
+        """Busca as definições atuais dos alarmes em lotes de até 100 nomes, retornando um dicionário por AlarmName."""
+        batches = [
+            alarm_names[index:index + DESCRIBE_ALARMS_BATCH_SIZE]
+            for index in range(0, len(alarm_names), DESCRIBE_ALARMS_BATCH_SIZE)
+        ]
+
+        def describe_batch(batch):
+            paginator = self.client.get_paginator('describe_alarms')
+            return [
+                alarm
+                for page in paginator.paginate(AlarmNames=batch, AlarmTypes=['MetricAlarm'])
+                for alarm in page.get('MetricAlarms', [])
+            ]
+
+        existing_alarms = {}
+        try:
+            with attach_limiter(limiter, self.client), ThreadPoolExecutor(max_workers=pool_size(limiter, max_workers)) as executor:
+                for alarms in executor.map(lambda batch: limited_call(limiter, describe_batch, batch), batches):
+                    for alarm in alarms:
+                        existing_alarms[alarm['AlarmName']] = alarm
+        except Exception as ex:
+            raise Exception(f'Failed to describe metric alarms: {str(ex)}')
+
+        return existing_alarms
+
+    def is_alarm_unchanged(self, alarm_dict, existing_alarm) -> bool:
+        desired = self.build_alarm_args(alarm_dict)
+        return all(
+            self._normalize_alarm_field(field, desired.get(field)) == self._normalize_alarm_field(field, existing_alarm.get(field))
+            for field in ALARM_DEFINITION_FIELDS
+        )
+
+    @staticmethod
+    def _normalize_alarm_field(field, value):
+        if field in ('OKActions', 'AlarmActions', 'InsufficientDataActions'):
+            return sorted(value or [])
+        if field == 'Dimensions':
+            return sorted((dimension['Name'], dimension['Value']) for dimension in value or [])
+        if field == 'Threshold':
+            return float(value) if value is not None else None
+        if field in ('AlarmDescription', 'TreatMissingData'):
+            return value or ''
+        return value
+
+    def batch_put_metric_alarms(
+            self,
+            alarms: list,
+            skip_unchanged: bool = False,
+            max_workers: int = 1,
+            limiter: AdaptiveConcurrencyLimiter = None
+        ):
+        """
+        Cria ou atualiza os alarmes informados.
+
+        :param skip_unchanged: Busca os alarmes existentes via describe_alarms e não reenvia os que não mudaram.
+        :param max_workers: Quantidade de chamadas put_metric_alarm executadas em paralelo.
+        :param limiter: Limitador adaptativo (ex.: get_limiter('cloudwatch')) que apenas ajusta a concorrência
+                        no lugar de max_workers; as novas tentativas após throttling ficam a cargo do botocore.
+        :return: Dicionário por AlarmName com o status de cada alarme.
+        """
         status = {}
-        
-        for alarm_data in alarms:
+        pending_alarms = alarms
+
+        if skip_unchanged:
+            existing_alarms = self.describe_alarms(
+                [alarm.get('AlarmName') for alarm in alarms], max_workers=max_workers, limiter=limiter
+            )
+            pending_alarms = []
+            for alarm_data in alarms:
+                existing_alarm = existing_alarms.get(alarm_data.get('AlarmName'))
+                if existing_alarm is not None and self.is_alarm_unchanged(alarm_data, existing_alarm):
+                    status[alarm_data.get('AlarmName')] = {'status': True, 'response': None, 'skipped': True}
+                else:
+                    pending_alarms.append(alarm_data)
+
+        def put_alarm(alarm_data):
             try:
-                response = self.put_metric_alarm(alarm_dict=alarm_data)
-                status[alarm_data.get('AlarmName')] = {'status': True, 'response': response}
+                response = limited_call(limiter, self.put_metric_alarm, alarm_dict=alarm_data)
+                return alarm_data.get('AlarmName'), {'status': True, 'response': response}
             except Exception as ex:
-                status[alarm_data.get('AlarmName')] = {'status': False, 'error': str(ex)}
+                return alarm_data.get('AlarmName'), {'status': False, 'error': str(ex)}
+
+        with attach_limiter(limiter, self.client), ThreadPoolExecutor(max_workers=pool_size(limiter, max_workers)) as executor:
+            for alarm_name, alarm_status in executor.map(put_alarm, pending_alarms):
+                status[alarm_name] = alarm_status
         
         return status
     
 
 # USAGE EXAMPLE
-cw_alarm_creator = CloudWatchAlarmCreator(region_name='sa-east-1')
-service_01_alarms = [
-            {
-            "AlarmName": f"Alarm for ECS Service",
-            "ActionsEnabled": True,
-            "OKActions": [
-                'arn:aws:sns:<REGION>:<ACCOUNT_ID>:<TOPIC_NAME>'
-            ],
-            "AlarmActions": [
-                'arn:aws:sns:<REGION>:<ACCOUNT_ID>:<TOPIC_NAME>'
-            ],
-            "InsufficientDataActions": [],
-            "MetricName": "RunningTaskCount",
-            "Namespace": "ECS/ContainerInsights",
-            "Statistic": "Average",
-            "Dimensions": [
+if __name__ == '__main__':
+    cw_alarm_creator = CloudWatchAlarmCreator(region_name='sa-east-1')
+    service_01_alarms = [
                 {
-                    "Name": "ServiceName",
-                    "Value": "my-service"
-                },
-                {
-                    "Name": "ClusterName",
-                    "Value": "my-clsuter"
-                }
-            ],
-            "Period": 300,
-            "EvaluationPeriods": 3,
-            "DatapointsToAlarm": 2,
-            "Threshold": 1,
-            "ComparisonOperator": "LessThanThreshold",
-            "TreatMissingData": "missing"
-        }
-]
-response_01 = cw_alarm_creator.batch_put_metric_alarms(alarms=service_01_alarms)
\ No newline at end of file
+                "AlarmName": f"Alarm for ECS Service",
+                "ActionsEnabled": True,
+                "OKActions": [
+                    'arn:aws:sns:<REGION>:<ACCOUNT_ID>:<TOPIC_NAME>'
+                ],
+                "AlarmActions": [
+                    'arn:aws:sns:<REGION>:<ACCOUNT_ID>:<TOPIC_NAME>'
+                ],
+                "InsufficientDataActions": [],
+                "MetricName": "RunningTaskCount",
+                "Namespace": "ECS/ContainerInsights",
+                "Statistic": "Average",
+                "Dimensions": [
+                    {
+                        "Name": "ServiceName",
+                        "Value": "my-service"
+                    },
+                    {
+                        "Name": "ClusterName",
+                        "Value": "my-clsuter"
+                    }
+                ],
+                "Period": 300,
+                "EvaluationPeriods": 3,
+                "DatapointsToAlarm": 2,
+                "Threshold": 1,
+                "ComparisonOperator": "LessThanThreshold",
+                "TreatMissingData": "missing"
+            }
+    ]
+    response_01 = cw_alarm_creator.batch_put_metric_alarms(alarms=service_01_alarms)
+
+    # Only push the alarms whose definition changed, 8 at a time
+    response_02 = cw_alarm_creator.batch_put_metric_alarms(alarms=service_01_alarms, skip_unchanged=True, max_workers=8)
\ No newline at end of file
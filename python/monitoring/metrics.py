@@ -0,0 +1,216 @@
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Tuple
+from utils.client_factory import get_client
+
+# put_metric_data limits: https://docs.aws.amazon.com/AmazonCloudWatch/latest/APIReference/API_PutMetricData.html
+MAX_DATUMS_PER_REQUEST = 1000
+MAX_REQUEST_BYTES = 1000000
+MAX_VALUES_PER_DATUM = 150
+
+# The request is form encoded, so reserve room over the JSON size used to estimate each datum
+REQUEST_BYTES_FACTOR = 2
+
+AGGREGATION_MODES = ('statistics', 'values')
+
+
+class MetricAggregate:
+
+    def __init__(self) -> None:
+        self.sample_count = 0
+        self.sum = 0.0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        self.values = Counter()
+
+    def add(self, value: float, count: int, keep_values: bool) -> None:
+        self.sample_count += count
+        self.sum += value * count
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if keep_values:
+            self.values[value] += count
+
+
+class CloudWatchMetricPublisher:
+    """
+    Agrega amostras de métricas customizadas localmente e as publica via put_metric_data em segundo plano.
+
+    As amostras são agregadas por (namespace, métrica, dimensões, unidade, resolução) e por período
+    (1 minuto, ou 1 segundo em alta resolução), então cada série gera um datum por período em vez de uma chamada por amostra.
+
+    :param mode: 'statistics' publica StatisticValues (SampleCount, Sum, Minimum, Maximum);
+                 'values' publica Values/Counts, o que permite percentis no CloudWatch.
+    :param flush_interval: Intervalo, em segundos, entre as publicações.
+    :param max_series: Quantidade máxima de séries agregadas em memória; ao atingi-la a publicação é antecipada e,
+                       enquanto ela não termina, amostras de séries novas são descartadas (stats['dropped_samples']).
+    """
+
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None, mode: str = 'statistics',
+                 flush_interval: float = 60.0, max_series: int = 100000):
+        if mode not in AGGREGATION_MODES:
+            raise ValueError(f'mode must be one of {AGGREGATION_MODES}')
+
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.mode = mode
+        self.flush_interval = flush_interval
+        self.max_series = max_series
+
+        self.series: Dict[Tuple[Any, ...], MetricAggregate] = {}
+        self.closed = False
+        self.condition = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.stats = {'samples': 0, 'datums': 0, 'requests': 0, 'failed_requests': 0, 'dropped_datums': 0,
+                      'dropped_samples': 0}
+
+        self.worker = threading.Thread(target=self._run, name='metric-publisher', daemon=True)
+        self.worker.start()
+
+    @property
+    def client(self):
+        return get_client('cloudwatch', self.region_name, endpoint_url=self.endpoint_url)
+
+    def put(self, namespace: str, metric_name: str, value: float, dimensions: Dict[str, str] = None,
+            unit: str = 'None', count: int = 1, timestamp: float = None, storage_resolution: int = 60) -> None:
+        """Registra uma amostra (ou count amostras iguais). timestamp em segundos desde a época; padrão é agora."""
+        period = 1 if storage_resolution == 1 else 60
+        timestamp = time.time() if timestamp is None else timestamp
+        key = (
+            namespace,
+            metric_name,
+            tuple(sorted((dimensions or {}).items())),
+            unit,
+            storage_resolution,
+            int(timestamp // period * period)
+        )
+
+        with self.condition:
+            if self.closed:
+                raise Exception('Metric publisher is closed')
+
+            aggregate = self.series.get(key)
+            if aggregate is None:
+                # A slow or failing publication must not let memory grow without bound
+                if len(self.series) >= self.max_series:
+                    self.stats['dropped_samples'] += count
+                    return
+                aggregate = self.series[key] = MetricAggregate()
+                if len(self.series) >= self.max_series:
+                    self.condition.notify_all()
+
+            aggregate.add(float(value), count, self.mode == 'values')
+            self.stats['samples'] += count
+
+    def flush(self) -> None:
+        """Publica imediatamente todas as séries agregadas."""
+        with self.condition:
+            series = self._take_series()
+        self._send(series)
+
+    def close(self) -> None:
+        """Publica as séries pendentes e encerra a thread de envio."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        self.flush()
+
+    def _take_series(self) -> Dict[Tuple[Any, ...], MetricAggregate]:
+        series, self.series = self.series, {}
+        return series
+
+    def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+
+        while True:
+            with self.condition:
+                while not self.closed and len(self.series) < self.max_series and time.monotonic() < next_flush:
+                    self.condition.wait(next_flush - time.monotonic())
+
+                closed = self.closed
+                series = self._take_series()
+
+            next_flush = time.monotonic() + self.flush_interval
+            try:
+                self._send(series)
+            except Exception as e:
+                self.stats['failed_requests'] += 1
+                print(f'Failed to publish {len(series)} metric series: {str(e)}')
+
+            if closed:
+                return
+
+    def _send(self, series: Dict[Tuple[Any, ...], MetricAggregate]) -> None:
+        by_namespace: Dict[str, List[Dict[str, Any]]] = {}
+        for key, aggregate in series.items():
+            by_namespace.setdefault(key[0], []).extend(self._build_datums(key, aggregate))
+
+        with self.send_lock:
+            for namespace, datums in by_namespace.items():
+                for batch in self._build_batches(datums):
+                    try:
+                        self.client.put_metric_data(Namespace=namespace, MetricData=batch)
+                        self.stats['requests'] += 1
+                        self.stats['datums'] += len(batch)
+
+                    except Exception as e:
+                        # Connection and timeout errors are not ClientError; the worker must survive them too
+                        self.stats['failed_requests'] += 1
+                        self.stats['dropped_datums'] += len(batch)
+                        print(f'Failed to put {len(batch)} metric datums to {namespace}: {str(e)}')
+
+    def _build_datums(self, key: Tuple[Any, ...], aggregate: MetricAggregate) -> Iterator[Dict[str, Any]]:
+        _, metric_name, dimensions, unit, storage_resolution, timestamp = key
+        datum = {
+            'MetricName': metric_name,
+            'Dimensions': [{'Name': name, 'Value': value} for name, value in dimensions],
+            'Timestamp': datetime.fromtimestamp(timestamp, tz=timezone.utc),
+            'Unit': unit,
+            'StorageResolution': storage_resolution
+        }
+
+        if self.mode == 'statistics':
+            yield {**datum, 'StatisticValues': {
+                'SampleCount': aggregate.sample_count,
+                'Sum': aggregate.sum,
+                'Minimum': aggregate.minimum,
+                'Maximum': aggregate.maximum
+            }}
+            return
+
+        # CloudWatch merges datums of the same series and timestamp, so more distinct values just take more datums
+        values = list(aggregate.values.items())
+        for index in range(0, len(values), MAX_VALUES_PER_DATUM):
+            chunk = values[index:index + MAX_VALUES_PER_DATUM]
+            yield {**datum, 'Values': [value for value, _ in chunk], 'Counts': [float(count) for _, count in chunk]}
+
+    @staticmethod
+    def _build_batches(datums: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        batch, batch_bytes = [], 0
+
+        for datum in datums:
+            datum_bytes = len(json.dumps(datum, default=str)) * REQUEST_BYTES_FACTOR
+            if batch and (len(batch) >= MAX_DATUMS_PER_REQUEST or batch_bytes + datum_bytes > MAX_REQUEST_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+
+            batch.append(datum)
+            batch_bytes += datum_bytes
+
+        if batch:
+            yield batch
+
+
+# USAGE EXAMPLE
+if __name__ == '__main__':
+    metric_publisher = CloudWatchMetricPublisher(region_name='sa-east-1', mode='values', flush_interval=60)
+
+    for latency in (12.0, 15.5, 12.0, 230.0):
+        metric_publisher.put('MyApp', 'RequestLatency', latency, dimensions={'Service': 'checkout'}, unit='Milliseconds')
+
+    # Publishes the pending aggregates before exiting
+    metric_publisher.close()
@@ -1,11 +1,23 @@
-import boto3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from utils.client_factory import get_client
+
+# Maximum number of entries accepted by a single publish_batch request
+PUBLISH_BATCH_SIZE = 10
 
 class SNSNotificationSender:
 
-    def __init__(self, enabled, region_name='sa-east-1') -> None:
-        self.client = boto3.client('sns', region_name=region_name)
+    def __init__(self, enabled, region_name='sa-east-1', endpoint_url: str = None) -> None:
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
         self.enabled= enabled 
 
+    @property
+    def client(self):
+        return get_client('sns', self.region_name, endpoint_url=self.endpoint_url)
+
     def publish(self, arn_topic: str, subject: str, message: str) -> bool:
         """Publish a message for a given SNS topic."""
 
@@ -18,7 +30,7 @@ class SNSNotificationSender:
         try:
             sns_response = self.client.publish(
                 TopicArn=arn_topic,
-                Message=message
+                Message=message,
                 Subject=subject
             )
 
@@ -30,17 +42,197 @@ class SNSNotificationSender:
             
         return False
 
+    def publish_many(self, arn_topic: str, messages: List[Tuple[str, str]], max_workers: int = 4) -> List[Dict[str, Any]]:
+        """
+        Publish (subject, message) pairs through publish_batch, 10 messages per call.
+
+        :return: One result per message, in the input order, with either the MessageId or the error.
+        """
+        if not arn_topic:
+            raise ValueError('ARN Topic not configured')
+
+        if self.enabled is False:
+            return [{'status': False, 'error': 'Sender disabled'} for _ in messages]
+
+        batches = [messages[index:index + PUBLISH_BATCH_SIZE] for index in range(0, len(messages), PUBLISH_BATCH_SIZE)]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return [
+                result
+                for batch_results in executor.map(lambda batch: self.publish_batch(arn_topic, batch), batches)
+                for result in batch_results
+            ]
+
+    def publish_batch(self, arn_topic: str, batch: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Publish up to 10 (subject, message) pairs in a single publish_batch call.
+
+        :return: One result per message, in the input order, with either the MessageId or the error.
+        """
+        if len(batch) > PUBLISH_BATCH_SIZE:
+            raise ValueError(f'publish_batch accepts at most {PUBLISH_BATCH_SIZE} messages')
+
+        if self.enabled is False:
+            return [{'status': False, 'error': 'Sender disabled'} for _ in batch]
+
+        entries = []
+        for index, (subject, message) in enumerate(batch):
+            entry = {'Id': str(index), 'Message': message}
+            # An empty Subject fails validation for the whole request, so it is only sent when present
+            if subject:
+                entry['Subject'] = subject
+            entries.append(entry)
+
+        try:
+            sns_response = self.client.publish_batch(TopicArn=arn_topic, PublishBatchRequestEntries=entries)
+        except Exception as exception:
+            return [{'status': False, 'error': str(exception)} for _ in batch]
+
+        results = [{'status': False, 'error': 'Missing from publish_batch response'} for _ in batch]
+        for success in sns_response.get('Successful', []):
+            results[int(success['Id'])] = {'status': True, 'message_id': success['MessageId']}
+        for failure in sns_response.get('Failed', []):
+            results[int(failure['Id'])] = {'status': False, 'error': f"{failure.get('Code')}: {failure.get('Message', '')}"}
+
+        return results
+
+
+class SNSPublishQueue:
+    """
+    Background queue that groups messages per topic into publish_batch calls.
+
+    A topic is flushed when it has 10 pending messages or its oldest message waited max_latency seconds.
+    Identical (topic, subject, message) submissions inside dedup_window seconds share the same result.
+    """
+
+    def __init__(self, sender: SNSNotificationSender, max_latency: float = 1.0, max_in_flight_per_topic: int = 2,
+                 dedup_window: float = 60.0, max_workers: int = 8) -> None:
+        self.sender = sender
+        self.max_latency = max_latency
+        self.max_in_flight_per_topic = max_in_flight_per_topic
+        self.dedup_window = dedup_window
+
+        self.pending: Dict[str, List[Tuple[float, str, str, Future]]] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.recent: Dict[Tuple[str, str, str], Tuple[float, Future]] = {}
+        self.closed = False
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sns-publish')
+
+        self.worker = threading.Thread(target=self._run, name='sns-publish-queue', daemon=True)
+        self.worker.start()
+
+    def submit(self, arn_topic: str, subject: str, message: str) -> Future:
+        """Queue a message and return a Future resolved with its publish result."""
+        if not arn_topic:
+            raise ValueError('ARN Topic not configured')
+
+        now = time.monotonic()
+        dedup_key = (arn_topic, subject, message)
+
+        with self.condition:
+            if self.closed:
+                raise Exception('SNS publish queue is closed')
+
+            recent = self.recent.get(dedup_key)
+            if recent is not None and now - recent[0] < self.dedup_window:
+                return recent[1]
+
+            future = Future()
+            self.recent[dedup_key] = (now, future)
+            self.pending.setdefault(arn_topic, []).append((now, subject, message, future))
+            self.condition.notify_all()
+
+        return future
+
+    def close(self) -> None:
+        """Flush every pending message and stop the background thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.worker.join()
+        self.executor.shutdown(wait=True)
+
+    def _ready_batches(self, now: float) -> List[Tuple[str, List[Tuple[float, str, str, Future]]]]:
+        ready = []
+        for arn_topic, messages in self.pending.items():
+            while messages and self.in_flight.get(arn_topic, 0) < self.max_in_flight_per_topic and (
+                len(messages) >= PUBLISH_BATCH_SIZE or now - messages[0][0] >= self.max_latency or self.closed
+            ):
+                ready.append((arn_topic, messages[:PUBLISH_BATCH_SIZE]))
+                del messages[:PUBLISH_BATCH_SIZE]
+                self.in_flight[arn_topic] = self.in_flight.get(arn_topic, 0) + 1
+        return ready
+
+    def _next_deadline(self, now: float) -> Optional[float]:
+        # Topics at their in-flight limit are woken up by _publish, not by the latency budget
+        oldest = [
+            messages[0][0] for arn_topic, messages in self.pending.items()
+            if messages and self.in_flight.get(arn_topic, 0) < self.max_in_flight_per_topic
+        ]
+        if not oldest:
+            return None
+        return max(0.0, min(oldest) + self.max_latency - now)
+
+    def _expire_recent(self, now: float) -> None:
+        for dedup_key, (submitted_at, _) in list(self.recent.items()):
+            if now - submitted_at >= self.dedup_window:
+                del self.recent[dedup_key]
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                now = time.monotonic()
+                ready = self._ready_batches(now)
+                if not ready:
+                    if self.closed and not any(self.pending.values()) and not any(self.in_flight.values()):
+                        return
+                    self._expire_recent(now)
+                    self.condition.wait(self._next_deadline(now))
+                    continue
+
+            for arn_topic, batch in ready:
+                self.executor.submit(self._publish, arn_topic, batch)
+
+    def _publish(self, arn_topic: str, batch: List[Tuple[float, str, str, Future]]) -> None:
+        try:
+            # Batches never exceed PUBLISH_BATCH_SIZE, so publish them directly from this worker
+            results = self.sender.publish_batch(arn_topic, [(subject, message) for _, subject, message, _ in batch])
+            for (_, _, _, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as exception:
+            for _, _, _, future in batch:
+                future.set_result({'status': False, 'error': str(exception)})
+        finally:
+            with self.condition:
+                self.in_flight[arn_topic] -= 1
+                self.condition.notify_all()
+
 # USAGE EXAMPLE
+if __name__ == '__main__':
             
-sns_sender = SNSNotificationSender(enabled=True)
-
-send_status = sns_sender.publish(
-    arn_topic='arn:aws:sns:region:account-id:topic-name',
-    subject='Important Alert', 
-    message='This is a important alert sent through SNS.'
-)
-
-if send_status:
-    print("The notification has been sent successfully.")
-else:
-    print("Failed publishing the message.")
\ No newline at end of file
+    sns_sender = SNSNotificationSender(enabled=True)
+
+    send_status = sns_sender.publish(
+        arn_topic='arn:aws:sns:region:account-id:topic-name',
+        subject='Important Alert', 
+        message='This is a important alert sent through SNS.'
+    )
+
+    if send_status:
+        print("The notification has been sent successfully.")
+    else:
+        print("Failed publishing the message.")
+
+    # Batched publishing with per-message results
+    results = sns_sender.publish_many(
+        arn_topic='arn:aws:sns:region:account-id:topic-name',
+        messages=[('Important Alert', f'Alert number {index}') for index in range(25)]
+    )
+    print(f"{sum(result['status'] for result in results)} of {len(results)} messages published.")
+
+    # Background queue flushing by size or latency, with deduplication
+    publish_queue = SNSPublishQueue(sns_sender, max_latency=0.5)
+    future = publish_queue.submit('arn:aws:sns:region:account-id:topic-name', 'Important Alert', 'Disk almost full')
+    publish_queue.close()
+    print(future.result())
@@ -1,19 +1,141 @@
-import boto3
 from botocore.exceptions import ClientError
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
 import json
+import threading
+import time
+from utils.client_factory import get_client
+
+
+class SecretCache:
+    """Cache LRU com TTL dos segredos já desserializados, com renovação em segundo plano antes de expirarem."""
+
+    def __init__(self, ttl: float = 300, max_size: int = 1000, refresh_ratio: float = 0.8, refresh_workers: int = 2):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh_after = ttl * refresh_ratio
+        self.entries: 'OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self.refreshing = set()
+        self.loading: Dict[Tuple[str, str], Future] = {}
+        # Loads that started before an invalidation must not store their (possibly stale) value
+        self.generation = 0
+        self.cleared_generation = 0
+        self.invalidated_generations: Dict[Tuple[str, str], int] = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='secret-refresh')
+        self.stats = {'hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0, 'evictions': 0}
+
+    def get(self, key: Tuple[str, str], loader) -> Dict[str, Any]:
+        """Retorna uma cópia do valor; misses simultâneos da mesma chave compartilham uma única chamada ao loader."""
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                if now - entry[0] >= self.refresh_after and key not in self.refreshing:
+                    self.refreshing.add(key)
+                    self.executor.submit(self._refresh, key, loader, self.generation)
+                return copy.deepcopy(entry[1])
+
+            self.stats['misses'] += 1
+            pending = self.loading.get(key)
+            if pending is None:
+                pending = self.loading[key] = Future()
+                generation = self.generation
+            else:
+                generation = None
+
+        if generation is not None:
+            try:
+                value = loader()
+                self.put(key, value, generation)
+                pending.set_result(value)
+            except Exception as exception:
+                pending.set_exception(exception)
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+
+        return copy.deepcopy(pending.result())
+
+    def put(self, key: Tuple[str, str], value: Dict[str, Any], generation: int = None) -> None:
+        with self.lock:
+            if generation is not None and self._invalidated_since(key, generation):
+                return
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, key: Optional[Tuple[str, str]] = None) -> None:
+        with self.lock:
+            self.generation += 1
+            if key is None:
+                self.entries.clear()
+                self.invalidated_generations.clear()
+                self.cleared_generation = self.generation
+            else:
+                self.entries.pop(key, None)
+                self.invalidated_generations[key] = self.generation
+
+    def snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.stats, size=len(self.entries))
+
+    def _invalidated_since(self, key: Tuple[str, str], generation: int) -> bool:
+        return max(self.cleared_generation, self.invalidated_generations.get(key, 0)) > generation
+
+    def _refresh(self, key: Tuple[str, str], loader, generation: int) -> None:
+        try:
+            value = loader()
+            self.put(key, value, generation)
+            with self.lock:
+                self.stats['refreshes'] += 1
+        except Exception:
+            # Keep serving the current value until it expires; the next miss surfaces the error
+            with self.lock:
+                self.stats['refresh_failures'] += 1
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
 
 class SecretsManager:
 
-    def __init__(self, region_name='sa-east-1'):
+    def __init__(self, region_name='sa-east-1', cache_ttl: float = 300, cache_max_size: int = 1000, endpoint_url: str = None):
         self.region_name = region_name
-        self.client = boto3.client('secretsmanager', region_name=region_name)
+        self.endpoint_url = endpoint_url
+        self.cache = SecretCache(ttl=cache_ttl, max_size=cache_max_size) if cache_ttl > 0 else None
+
+    @property
+    def client(self):
+        return get_client('secretsmanager', self.region_name, endpoint_url=self.endpoint_url)
 
-    def get_secret(self, name: str) -> Dict[str, Any]:
-        """Recupera o valor de um segredo armazenado no AWS Secrets Manager."""
+    def get_secret(self, name: str, version_stage: str = 'AWSCURRENT') -> Dict[str, Any]:
+        """Recupera o valor de um segredo armazenado no AWS Secrets Manager, usando o cache quando habilitado."""
+        if self.cache is None:
+            return self._load_secret(name, version_stage)
+
+        return self.cache.get((name, version_stage), lambda: self._load_secret(name, version_stage))
+
+    def invalidate_secret(self, name: str = None, version_stage: str = 'AWSCURRENT') -> None:
+        """Remove um segredo do cache (ou todos, se name não for informado)."""
+        if self.cache is not None:
+            self.cache.invalidate((name, version_stage) if name else None)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Retorna os contadores de hit/miss/refresh do cache."""
+        return self.cache.snapshot() if self.cache is not None else {}
+
+    def _load_secret(self, name: str, version_stage: str) -> Dict[str, Any]:
         try:
         
-            response = self.client.get_secret_value(SecretId=name)
+            response = self.client.get_secret_value(SecretId=name, VersionStage=version_stage)
             secret_string = response.get('SecretString', '{}')
             secret_value = json.loads(secret_string)
             return secret_value
@@ -23,13 +145,18 @@ class SecretsManager:
         
 
 # USAGE EXAMPLE
-secret_name = '/my/secret'
+if __name__ == '__main__':
+    secret_name = '/my/secret'
+
+    secrets_manager = SecretsManager()
 
-secrets_manager = SecretsManager()
+    try:
+        secret = secrets_manager.get_secret(secret_name)
+        print(f"Secret value: {secret}")
 
-try:
-    secret = secrets_manager.get_secret(secret_name)
-    print(f"Secret value: {secret}")
+        # Subsequent reads are served from the in-process cache
+        secret = secrets_manager.get_secret(secret_name)
+        print(f"Cache stats: {secrets_manager.cache_stats()}")
 
-except Exception as e:
-    print(f"Failed recovering secret {secret_name}: {e}")
\ No newline at end of file
+    except Exception as e:
+        print(f"Failed recovering secret {secret_name}: {e}")
\ No newline at end of file
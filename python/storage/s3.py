@@ -1,18 +1,65 @@
-from typing import Any, Dict
-import boto3
-from botocore.exceptions import ClientError
+import mmap
+import string
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
+from utils.client_factory import get_client
+from utils.concurrency import PageChannel
+
+MB = 1024 * 1024
+
+# Maximum number of keys accepted by a single delete_objects request
+DELETE_BATCH_SIZE = 1000
+
+# Printable ASCII characters used to split a prefix into key ranges
+DEFAULT_SHARD_CHARACTERS = string.digits + string.ascii_uppercase + string.ascii_lowercase
+
+
+class S3ObjectRecord(NamedTuple):
+    key: str
+    size: int
+    etag: str
+    mtime: datetime
+
 
 class S3Manager:
 
-    def __init__(self, region_name='sa-east-1'):
-        self.client = boto3.client('s3', region_name=region_name)
+    def __init__(self, region_name='sa-east-1', endpoint_url: str = None,
+                 part_size: int = 8 * MB, max_concurrency: int = 10, max_memory: int = 256 * MB):
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.configure_transfer(part_size=part_size, max_concurrency=max_concurrency, max_memory=max_memory)
+
+    @property
+    def client(self):
+        return get_client('s3', self.region_name, endpoint_url=self.endpoint_url)
+
+    def configure_transfer(self, part_size: int, max_concurrency: int, max_memory: int) -> None:
+        """Ajusta o tamanho das partes, a concorrência e o teto de memória usados nas transferências."""
+        if part_size < 5 * MB:
+            raise ValueError('part_size must be at least 5 MB (S3 multipart minimum)')
+
+        self.part_size = part_size
+        # Each in-flight part holds one buffer, so the memory ceiling bounds the concurrency
+        self.max_concurrency = max(1, min(max_concurrency, max_memory // part_size))
+        self.max_memory = max_memory
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=self.max_concurrency
+        )
+        # Uploads read each part into memory before sending it, so cap the buffered parts by the memory ceiling
+        self.transfer_config.max_in_memory_upload_chunks = max(1, max_memory // part_size)
 
     def upload_file_obj(self, file_obj: any,  bucket_name: str, object_name: str) -> Dict[str, Any]:
         try:
             return self.client.upload_fileobj(
                 file_obj,
                 bucket_name,
-                object_name
+                object_name,
+                Config=self.transfer_config
             )
         except ClientError as exception:
             raise Exception(f'Failed uploading file to {bucket_name}/{object_name}: {str(exception)}')
@@ -30,16 +77,118 @@ class S3Manager:
         except ClientError as exception:
             raise Exception(f'Failed to get object {object_name} from bucket {bucket_name}: {str(exception)}')
     
-    def list_objects(self, bucket_name: str, prefix: str) -> Dict[str, Any]:
+    def list_objects(self, bucket_name: str, prefix: str = '') -> Dict[str, Any]:
+        """Lista todos os objetos do prefixo, seguindo os continuation tokens. Prefira iter_objects para buckets grandes."""
+        contents = [
+            {'Key': record.key, 'Size': record.size, 'ETag': record.etag, 'LastModified': record.mtime}
+            for record in self.iter_objects(bucket_name, prefix)
+        ]
+
+        return {'Name': bucket_name, 'Prefix': prefix, 'KeyCount': len(contents), 'Contents': contents}
+
+    def iter_objects(self, bucket_name: str, prefix: str = '', start_after: str = None,
+                     end_before: str = None) -> Iterator[S3ObjectRecord]:
+        """
+        Gera os objetos do prefixo página a página, mantendo apenas uma página em memória.
+
+        :param start_after: Lista apenas chaves maiores que este valor.
+        :param end_before: Interrompe a listagem na primeira chave maior ou igual a este valor.
+        """
+        pagination_args = {'Bucket': bucket_name, 'Prefix': prefix}
+        if start_after:
+            pagination_args['StartAfter'] = start_after
 
         try:
-            return self.client.list_objects_v2(
-                Bucket=bucket_name,
-                Prefix=prefix
-            )
+            for page in self.client.get_paginator('list_objects_v2').paginate(**pagination_args):
+                for item in page.get('Contents', []):
+                    if end_before is not None and item['Key'] >= end_before:
+                        return
+                    yield S3ObjectRecord(item['Key'], item['Size'], item['ETag'], item['LastModified'])
+
         except ClientError as exception:
             raise Exception(f'Failed to list objects: {str(exception)}')
-    
+
+    def iter_objects_sharded(self, bucket_name: str, prefix: str = '', delimiter: str = None,
+                             shard_characters: str = DEFAULT_SHARD_CHARACTERS,
+                             max_concurrency: int = None, buffer_pages: int = 16) -> Iterator[S3ObjectRecord]:
+        """
+        Lista o prefixo em shards concorrentes. A ordem dos registros entre shards não é garantida.
+
+        :param delimiter: Se informado, cada CommonPrefix abaixo do prefixo vira um shard.
+                          Caso contrário, o espaço de chaves é dividido pelos caracteres em shard_characters.
+        :param buffer_pages: Quantidade máxima de páginas aguardando consumo, limitando o uso de memória.
+        """
+        if delimiter:
+            shards = self._delimiter_shards(bucket_name, prefix, delimiter)
+        else:
+            shards = self._character_shards(prefix, shard_characters)
+
+        yield from self._merge_shards(bucket_name, shards, max_concurrency or self.max_concurrency, buffer_pages)
+
+    def _delimiter_shards(self, bucket_name: str, prefix: str, delimiter: str) -> List[Dict[str, Any]]:
+        # Objects stored directly under the prefix form their own shard, restricted to the first level
+        shards = [{'Prefix': prefix, 'Delimiter': delimiter}]
+
+        try:
+            paginator = self.client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter=delimiter):
+                for common_prefix in page.get('CommonPrefixes', []):
+                    shards.append({'Prefix': common_prefix['Prefix']})
+
+        except ClientError as exception:
+            raise Exception(f'Failed to list prefixes of {bucket_name}/{prefix}: {str(exception)}')
+
+        return shards
+
+    def _character_shards(self, prefix: str, shard_characters: str) -> List[Dict[str, Any]]:
+        boundaries = [prefix + character for character in sorted(set(shard_characters))]
+        shards = []
+
+        for index in range(len(boundaries) + 1):
+            shard = {'Prefix': prefix}
+            if index > 0:
+                lower = boundaries[index - 1]
+                # StartAfter is exclusive: start just below the boundary and drop keys that still sort before it
+                shard['StartAfter'] = lower[:-1] + chr(ord(lower[-1]) - 1) + '\U0010ffff'
+                shard['StartAt'] = lower
+            if index < len(boundaries):
+                shard['EndBefore'] = boundaries[index]
+            shards.append(shard)
+
+        return shards
+
+    def _iter_shard(self, bucket_name: str, shard: Dict[str, Any]) -> Iterator[List[S3ObjectRecord]]:
+        pagination_args = {'Bucket': bucket_name, 'Prefix': shard['Prefix']}
+        for argument in ('StartAfter', 'Delimiter'):
+            if shard.get(argument):
+                pagination_args[argument] = shard[argument]
+
+        start_at, end_before = shard.get('StartAt'), shard.get('EndBefore')
+
+        for page in self.client.get_paginator('list_objects_v2').paginate(**pagination_args):
+            records = []
+            for item in page.get('Contents', []):
+                if start_at is not None and item['Key'] < start_at:
+                    continue
+                if end_before is not None and item['Key'] >= end_before:
+                    yield records
+                    return
+                records.append(S3ObjectRecord(item['Key'], item['Size'], item['ETag'], item['LastModified']))
+            yield records
+
+    def _merge_shards(self, bucket_name: str, shards: List[Dict[str, Any]], max_concurrency: int,
+                      buffer_pages: int) -> Iterator[S3ObjectRecord]:
+        channel = PageChannel(buffer_pages)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            for shard in shards:
+                executor.submit(channel.produce, self._iter_shard(bucket_name, shard), f'list shard {shard}')
+
+            try:
+                yield from channel.consume(len(shards))
+            finally:
+                channel.stop()
+
     def delete_object(self, bucket_name: str, object_name: str) -> Dict[str, Any]:
         try:
             return self.client.delete_object(
@@ -48,20 +197,164 @@ class S3Manager:
             )
         except ClientError as exception:
             raise Exception(f'Failed to delete object {bucket_name}/{object_name}: {str(exception)}')
-        
+
+    def delete_many(self, bucket_name: str, keys: Iterable[Union[str, S3ObjectRecord]],
+                    max_concurrency: int = None) -> Dict[str, Any]:
+        """
+        Remove as chaves em lotes de até 1000 via delete_objects, executando vários lotes em paralelo.
+
+        :param keys: Qualquer iterável de chaves ou de S3ObjectRecord, como o gerador de iter_objects.
+        :return: Dicionário com a quantidade de chaves removidas e a lista de erros por chave.
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        status = {'deleted': 0, 'errors': []}
+
+        def collect(future) -> None:
+            deleted, errors = future.result()
+            status['deleted'] += deleted
+            status['errors'].extend(errors)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = set()
+            for batch in self._batch_keys(keys):
+                pending.add(executor.submit(self._delete_batch, bucket_name, batch))
+                # Keep at most a few batches per worker in flight so the key stream is consumed lazily
+                if len(pending) >= max_concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+
+            for future in pending:
+                collect(future)
+
+        return status
+
+    def _batch_keys(self, keys: Iterable[Union[str, S3ObjectRecord]]) -> Iterator[List[str]]:
+        batch = []
+        for key in keys:
+            batch.append(key.key if isinstance(key, S3ObjectRecord) else key)
+            if len(batch) == DELETE_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _delete_batch(self, bucket_name: str, batch: List[str]) -> Tuple[int, List[Dict[str, str]]]:
+        try:
+            response = self.client.delete_objects(
+                Bucket=bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+        except ClientError as exception:
+            code = exception.response['Error']['Code']
+            return 0, [{'Key': key, 'Code': code, 'Message': str(exception)} for key in batch]
+        except BotoCoreError as exception:
+            # Timeouts and connection resets fail only this batch, the remaining batches keep running
+            code = type(exception).__name__
+            return 0, [{'Key': key, 'Code': code, 'Message': str(exception)} for key in batch]
+
+        errors = [
+            {'Key': error.get('Key'), 'Code': error.get('Code'), 'Message': error.get('Message')}
+            for error in response.get('Errors', [])
+        ]
+        return len(batch) - len(errors), errors
+
+    def get_object_size(self, bucket_name: str, object_name: str) -> int:
+        try:
+            return self.client.head_object(Bucket=bucket_name, Key=object_name)['ContentLength']
+        except ClientError as exception:
+            raise Exception(f'Failed to get size of object {bucket_name}/{object_name}: {str(exception)}')
+
+    def _get_range(self, bucket_name: str, object_name: str, start: int, end: int) -> bytes:
+        try:
+            return self.client.get_object(
+                Bucket=bucket_name,
+                Key=object_name,
+                Range=f'bytes={start}-{end}'
+            )['Body'].read()
+        except ClientError as exception:
+            raise Exception(f'Failed to get range {start}-{end} of {bucket_name}/{object_name}: {str(exception)}')
+
+    def _ranges(self, size: int) -> Iterator[Tuple[int, int]]:
+        for start in range(0, size, self.part_size):
+            yield start, min(start + self.part_size, size) - 1
+
+    def iter_ranges(self, bucket_name: str, object_name: str, size: int = None) -> Iterator[Tuple[int, bytes]]:
+        """Baixa o objeto em faixas paralelas, gerando (offset, bytes) na ordem em que ficam prontas."""
+        if size is None:
+            size = self.get_object_size(bucket_name, object_name)
+        ranges = self._ranges(size)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = {}
+            for start, end in ranges:
+                pending[executor.submit(self._get_range, bucket_name, object_name, start, end)] = start
+                if len(pending) < self.max_concurrency:
+                    continue
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+
+    def download_to(self, bucket_name: str, object_name: str, destination: Union[str, bytearray, mmap.mmap]) -> int:
+        """
+        Baixa o objeto em faixas paralelas direto para um arquivo pré-alocado ou buffer gravável.
+
+        :param destination: Caminho do arquivo (pré-alocado e mapeado em memória) ou buffer gravável com pelo menos o tamanho do objeto.
+        :return: Quantidade de bytes gravados.
+        """
+        size = self.get_object_size(bucket_name, object_name)
+
+        if not isinstance(destination, str):
+            buffer = memoryview(destination).cast('B')
+            if len(buffer) < size:
+                raise ValueError(f'Destination buffer has {len(buffer)} bytes, object {bucket_name}/{object_name} has {size}')
+            for offset, chunk in self.iter_ranges(bucket_name, object_name, size):
+                buffer[offset:offset + len(chunk)] = chunk
+            return size
+
+        with open(destination, 'wb+') as file:
+            file.truncate(size)
+            if size == 0:
+                return 0
+
+            with mmap.mmap(file.fileno(), size) as mapped_file:
+                for offset, chunk in self.iter_ranges(bucket_name, object_name, size):
+                    mapped_file[offset:offset + len(chunk)] = chunk
+                mapped_file.flush()
+
+        return size
+
 
 # USAGE EXAMPLE
-s3_manager = S3Manager(region_name='sa-east-1')
+if __name__ == '__main__':
+    s3_manager = S3Manager(region_name='sa-east-1')
         
-# Uploading a file
-with open('/path/to/file/test.py', 'rb') as file:
-    s3_manager.upload_file_obj(file, 'test-bucket-011124', object_name='resources/test.py')
+    # Uploading a file
+    with open('/path/to/file/test.py', 'rb') as file:
+        s3_manager.upload_file_obj(file, 'test-bucket-011124', object_name='resources/test.py')
         
-# Get Object
-s3_object = s3_manager.get_object('my-bucket', 'file.txt')
+    # Get Object
+    s3_object = s3_manager.get_object('my-bucket', 'file.txt')
+
+    # Parallel ranged download into a preallocated file
+    s3_manager.download_to('my-bucket', 'artifacts/build.tar.gz', '/tmp/build.tar.gz')
         
-# Listing bucket objects
-objetos = s3_manager.list_objects('my-bucket')
+    # Listing bucket objects
+    objetos = s3_manager.list_objects('my-bucket')
+
+    # Streaming bucket objects lazily, listing the key space in concurrent shards
+    for record in s3_manager.iter_objects_sharded('my-bucket', prefix='logs/'):
+        print(record.key, record.size)
         
-# Delete a object
-s3_manager.delete_object('my-bucket', 'file.txt')
\ No newline at end of file
+    # Delete a object
+    s3_manager.delete_object('my-bucket', 'file.txt')
+
+    # Delete everything under a prefix as a listing -> delete pipeline
+    delete_status = s3_manager.delete_many('my-bucket', s3_manager.iter_objects('my-bucket', prefix='tmp/'))
+    print(f"Deleted {delete_status['deleted']} objects, {len(delete_status['errors'])} errors")
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+from typing import AsyncIterator, Tuple, Union
+from storage.s3 import DEFAULT_SHARD_CHARACTERS, S3Manager, S3ObjectRecord
+from utils.aio import AsyncManager, iterate_blocking, run_blocking
+
+
+class AsyncS3Manager(AsyncManager):
+    """
+    Versão assíncrona do S3Manager: os mesmos métodos, como corrotinas, e iteradores como async generators.
+
+    As chamadas rodam no executor compartilhado de utils.aio sobre o mesmo cliente boto3 do S3Manager.
+    """
+
+    manager_class = S3Manager
+
+    async def iter_objects(self, bucket_name: str, prefix: str = '', start_after: str = None,
+                           end_before: str = None) -> AsyncIterator[S3ObjectRecord]:
+        async for record in iterate_blocking(self.manager.iter_objects(bucket_name, prefix, start_after, end_before)):
+            yield record
+
+    async def iter_objects_sharded(self, bucket_name: str, prefix: str = '', delimiter: str = None,
+                                   shard_characters: str = DEFAULT_SHARD_CHARACTERS,
+                                   max_concurrency: int = None, buffer_pages: int = 16) -> AsyncIterator[S3ObjectRecord]:
+        records = self.manager.iter_objects_sharded(
+            bucket_name, prefix, delimiter, shard_characters, max_concurrency, buffer_pages
+        )
+        async for record in iterate_blocking(records):
+            yield record
+
+    async def iter_ranges(self, bucket_name: str, object_name: str, size: int = None) -> AsyncIterator[Tuple[int, bytes]]:
+        """Baixa o objeto em faixas concorrentes, gerando (offset, bytes) na ordem em que ficam prontas."""
+        if size is None:
+            size = await run_blocking(self.manager.get_object_size, bucket_name, object_name)
+
+        pending = {}
+        try:
+            for start, end in self.manager._ranges(size):
+                task = asyncio.ensure_future(run_blocking(self.manager._get_range, bucket_name, object_name, start, end))
+                pending[task] = start
+                if len(pending) < self.manager.max_concurrency:
+                    continue
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield pending.pop(task), task.result()
+
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def download_to(self, bucket_name: str, object_name: str, destination: Union[str, bytearray]) -> int:
+        """Baixa o objeto em faixas concorrentes para um buffer gravável; caminhos de arquivo usam o executor."""
+        if isinstance(destination, str):
+            return await run_blocking(self.manager.download_to, bucket_name, object_name, destination)
+
+        size = await run_blocking(self.manager.get_object_size, bucket_name, object_name)
+        buffer = memoryview(destination).cast('B')
+        if len(buffer) < size:
+            raise ValueError(f'Destination buffer has {len(buffer)} bytes, object {bucket_name}/{object_name} has {size}')
+
+        async for offset, chunk in self.iter_ranges(bucket_name, object_name, size):
+            buffer[offset:offset + len(chunk)] = chunk
+        return size
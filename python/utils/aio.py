@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator
+from utils.client_factory import DEFAULT_CONFIG
+
+# One blocking call per pooled connection: more threads would only wait for a free connection
+DEFAULT_MAX_THREADS = DEFAULT_CONFIG['max_pool_connections']
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Retorna o executor compartilhado por todos os managers assíncronos, criando-o no primeiro uso."""
+    global executor
+
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=DEFAULT_MAX_THREADS, thread_name_prefix='aws-async')
+        return executor
+
+
+def configure_executor(max_workers: int) -> None:
+    """Substitui o executor compartilhado; as chamadas já submetidas terminam no executor anterior."""
+    global executor
+
+    with executor_lock:
+        previous_executor = executor
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aws-async')
+
+    if previous_executor is not None:
+        previous_executor.shutdown(wait=False)
+
+
+async def run_blocking(function: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa a chamada bloqueante no executor compartilhado sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(function, *args, **kwargs))
+
+
+async def iterate_blocking(iterator: Iterator[Any], batch_size: int = 1000) -> AsyncIterator[Any]:
+    """Consome um iterador bloqueante no executor em lotes de batch_size itens, evitando uma troca de thread por item."""
+    pending = None
+    try:
+        while True:
+            pending = get_executor().submit(list, itertools.islice(iterator, batch_size))
+            batch = await asyncio.wrap_future(pending)
+            for item in batch:
+                yield item
+            if len(batch) < batch_size:
+                return
+    finally:
+        # A cancelled consumer leaves the batch running in its thread; closing the generator before it
+        # finishes would raise "generator already executing" and hide the original error
+        if pending is not None and not pending.done():
+            await asyncio.wait([asyncio.wrap_future(pending)])
+
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await run_blocking(close)
+
+
+class AsyncManager:
+    """
+    Expõe os métodos públicos de um manager síncrono como corrotinas executadas no executor compartilhado.
+
+    Subclasses definem manager_class e sobrescrevem os métodos que geram resultados (iteradores)
+    ou que ganham com fan-out nativo em asyncio.
+    """
+
+    manager_class = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        self.manager = self.manager_class(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.manager, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def coroutine(*args, **kwargs):
+            return await run_blocking(attribute, *args, **kwargs)
+
+        return coroutine
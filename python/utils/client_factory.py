@@ -0,0 +1,70 @@
+import json
+import threading
+from typing import Any, Callable, Dict, List, Tuple
+import boto3
+from botocore.config import Config
+
+# Shared clients serve every manager of the same service, so allow more pooled connections than botocore's default of 10
+DEFAULT_CONFIG = {'max_pool_connections': 50}
+
+
+class ClientFactory:
+    """
+    Cria clientes boto3 sob demanda e os compartilha entre os managers.
+
+    Os clientes são indexados por (serviço, região, endpoint, config) e reaproveitam o mesmo pool de conexões HTTP.
+    Clientes boto3 são thread-safe depois de criados; apenas a criação é serializada.
+    """
+
+    def __init__(self) -> None:
+        self.session = None
+        self.clients: Dict[Tuple[Any, ...], Any] = {}
+        self.client_hooks: List[Callable[[Any], None]] = []
+        self.lock = threading.Lock()
+
+    def add_client_hook(self, hook: Callable[[Any], None]) -> None:
+        """Registra uma função chamada com cada cliente criado, inclusive os que já existem."""
+        with self.lock:
+            self.client_hooks.append(hook)
+            clients = list(self.clients.values())
+
+        for client in clients:
+            hook(client)
+
+    def get_client(self, service_name: str, region_name: str, endpoint_url: str = None, config: dict = None):
+        # Config values may be nested dicts (e.g. retries), so key on a canonical JSON form instead of the items
+        key = (service_name, region_name, endpoint_url, json.dumps(config or {}, sort_keys=True, default=str))
+
+        client = self.clients.get(key)
+        if client is not None:
+            return client
+
+        with self.lock:
+            client = self.clients.get(key)
+            if client is None:
+                if self.session is None:
+                    self.session = boto3.session.Session()
+
+                client = self.session.client(
+                    service_name,
+                    region_name=region_name,
+                    endpoint_url=endpoint_url,
+                    config=Config(**{**DEFAULT_CONFIG, **(config or {})})
+                )
+                for hook in self.client_hooks:
+                    hook(client)
+                self.clients[key] = client
+
+        return client
+
+    def clear(self) -> None:
+        with self.lock:
+            self.clients.clear()
+
+
+client_factory = ClientFactory()
+
+
+def get_client(service_name: str, region_name: str, endpoint_url: str = None, config: dict = None):
+    """Retorna o cliente compartilhado do serviço, criando-o no primeiro uso."""
+    return client_factory.get_client(service_name, region_name, endpoint_url=endpoint_url, config=config)
@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+from botocore.exceptions import ClientError
+from utils.instrumentation import is_throttling_error
+
+
+def is_throttling_exception(exception: BaseException) -> bool:
+    """Verifica se a exceção, ou alguma da cadeia que a originou, é um erro de throttling da AWS."""
+    while exception is not None:
+        if isinstance(exception, ClientError):
+            error = exception.response.get('Error', {})
+            status_code = exception.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+            if is_throttling_error(error.get('Code'), status_code):
+                return True
+        exception = exception.__cause__ or exception.__context__
+    return False
+
+
+class TokenBucket:
+    """Limita a taxa de chamadas a `rate` por segundo, permitindo rajadas de até `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None) -> None:
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+
+                wait = (tokens - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def drain(self) -> None:
+        with self.lock:
+            self.tokens = 0.0
+            self.updated_at = time.monotonic()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limitador de concorrência AIMD: o limite cresce `increase` a cada rodada de chamadas bem-sucedidas
+    e é multiplicado por `decrease_factor` quando ocorre throttling (no máximo uma vez por `decrease_cooldown`).
+
+    Um mesmo limitador deve ser compartilhado por todas as operações em lote que consomem a mesma cota,
+    por isso get_limiter mantém uma instância por serviço. As novas tentativas ficam a cargo do botocore:
+    com attach, cada tentativa com throttling já reduz o limite, sem multiplicar as requisições por item.
+    O handler fica registrado apenas enquanto houver operações em lote usando o limitador naquele cliente.
+    """
+
+    def __init__(
+            self,
+            initial_limit: float = 4,
+            min_limit: float = 1,
+            max_limit: float = 64,
+            increase: float = 1.0,
+            decrease_factor: float = 0.5,
+            decrease_cooldown: float = 1.0,
+            rate: float = None,
+            burst: float = None
+        ) -> None:
+        # At least one call must always be allowed, otherwise acquire would block forever
+        self.min_limit = max(1.0, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.bucket = TokenBucket(rate, burst) if rate else None
+
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.stats = {'successes': 0, 'throttles': 0, 'decreases': 0}
+        self.condition = threading.Condition()
+        self.attachments: Dict[int, int] = {}
+        self.attachments_lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+        if self.bucket is not None:
+            self.bucket.acquire()
+
+    def release(self) -> None:
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def on_success(self) -> None:
+        with self.condition:
+            self.stats['successes'] += 1
+            previous_limit = int(self.limit)
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            if int(self.limit) > previous_limit:
+                self.condition.notify_all()
+
+    def on_throttle(self) -> None:
+        with self.condition:
+            self.stats['throttles'] += 1
+            now = time.monotonic()
+            # A burst of throttles from calls already in flight reflects a single overload, not several
+            if now - self.last_decrease < self.decrease_cooldown:
+                return
+            self.last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self.stats['decreases'] += 1
+
+        if self.bucket is not None:
+            self.bucket.drain()
+
+    def call(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Executa a função dentro do limite; um throttling que esgotou as tentativas do botocore reduz o limite e é repassado."""
+        self.acquire()
+        try:
+            result = function(*args, **kwargs)
+        except Exception as exception:
+            if is_throttling_exception(exception):
+                self.on_throttle()
+            raise
+        finally:
+            self.release()
+
+        self.on_success()
+        return result
+
+    def attach(self, client) -> None:
+        """Reduz o limite já nas tentativas repetidas internamente pelo botocore, antes que a chamada falhe. Cada attach exige um detach."""
+        with self.attachments_lock:
+            key = id(client.meta.events)
+            if not self.attachments.get(key):
+                client.meta.events.register('needs-retry', self._needs_retry, unique_id=self._unique_id)
+            self.attachments[key] = self.attachments.get(key, 0) + 1
+
+    def detach(self, client) -> None:
+        """Desfaz um attach; o handler sai do cliente quando a última operação que o usava termina."""
+        with self.attachments_lock:
+            key = id(client.meta.events)
+            remaining = self.attachments.get(key, 0) - 1
+            if remaining > 0:
+                self.attachments[key] = remaining
+                return
+            self.attachments.pop(key, None)
+            client.meta.events.unregister('needs-retry', self._needs_retry, unique_id=self._unique_id)
+
+    @property
+    def _unique_id(self) -> str:
+        return f'adaptive-limiter-{id(self)}'
+
+    def _needs_retry(self, response, **kwargs) -> None:
+        if response is not None:
+            http_response, parsed = response
+            if is_throttling_error(parsed.get('Error', {}).get('Code'), http_response.status_code):
+                self.on_throttle()
+        return None
+
+
+class PageChannel:
+    """
+    Fila limitada entre threads produtoras de páginas e um consumidor que pode parar de ler a qualquer momento.
+
+    Cada produtor termina com um marcador de fim, inclusive quando falha; a falha é entregue ao consumidor como exceção.
+    Canais que compartilham o mesmo evento stopped param juntos.
+    """
+
+    DONE = object()
+
+    def __init__(self, maxsize: int, stopped: threading.Event = None) -> None:
+        self.pages = queue.Queue(maxsize=maxsize)
+        self.stopped = stopped or threading.Event()
+
+    def put(self, item) -> bool:
+        while not self.stopped.is_set():
+            try:
+                self.pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self, pages: Iterable[List[Any]], description: str) -> None:
+        """Copia as páginas para o canal; qualquer exceção vira um erro para o consumidor, nunca um fim silencioso."""
+        if self.stopped.is_set():
+            return
+        try:
+            for page in pages:
+                if page and not self.put(page):
+                    return
+        except Exception as exception:
+            self.put(Exception(f'Failed to {description}: {str(exception)}'))
+        finally:
+            self.put(self.DONE)
+
+    def consume(self, producers: int = 1) -> Iterator[Any]:
+        """Gera os itens das páginas até que os producers produtores terminem."""
+        remaining = producers
+        while remaining:
+            item = self.pages.get()
+            if item is self.DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield from item
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+limiters: Dict[str, AdaptiveConcurrencyLimiter] = {}
+limiters_lock = threading.Lock()
+
+
+def get_limiter(service_name: str, **limiter_args) -> AdaptiveConcurrencyLimiter:
+    """Retorna o limitador compartilhado do serviço, criando-o com limiter_args no primeiro uso."""
+    with limiters_lock:
+        limiter = limiters.get(service_name)
+        if limiter is None:
+            limiter = limiters[service_name] = AdaptiveConcurrencyLimiter(**limiter_args)
+        return limiter
+
+
+@contextmanager
+def attach_limiter(limiter: AdaptiveConcurrencyLimiter, client) -> Iterator[None]:
+    """Liga o limitador, se informado, aos eventos de retry do cliente durante a operação em lote, e o desliga ao final."""
+    if limiter is None:
+        yield
+        return
+
+    # The client is shared process-wide, so the handler must not outlive the bulk operation
+    limiter.attach(client)
+    try:
+        yield
+    finally:
+        limiter.detach(client)
+
+
+def limited_call(limiter: AdaptiveConcurrencyLimiter, function: Callable[..., Any], *args, **kwargs) -> Any:
+    """Chama a função através do limitador, ou diretamente quando nenhum for informado."""
+    if limiter is None:
+        return function(*args, **kwargs)
+    return limiter.call(function, *args, **kwargs)
+
+
+def pool_size(limiter: AdaptiveConcurrencyLimiter, max_workers: int) -> int:
+    """Com um limitador, o pool precisa de threads até o limite máximo; quem regula a concorrência é o limitador."""
+    return max_workers if limiter is None else max(max_workers, int(limiter.max_limit))
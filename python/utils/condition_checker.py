@@ -1,5 +1,29 @@
-from typing import List, Callable, Dict, Any, Tuple
+from typing import List, Callable, Dict, Any, Iterable, Iterator, Tuple, Union
 from collections import defaultdict
+import operator
+import os
+import pickle
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A declarative condition: (field, operator, value), e.g. ('quantity', '>=', 1)
+Condition = Union[Tuple[str, str, Any], Callable[[Dict[str, Any]], bool]]
+
+COMPARISON_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+# Partitions that still exceed the memory budget are split again, up to this many levels
+MAX_PARTITION_DEPTH = 4
 
 
 class DataFilter:
@@ -7,7 +31,7 @@ class DataFilter:
         pass
     
     @staticmethod
-    def validate_by_conditions(data: List[Dict[str, Any]], conditions: List[Callable[[Dict[str, Any]], bool]]) -> Tuple[List[Any], List[Any]]:
+    def validate_by_conditions(data: List[Dict[str, Any]], conditions: List[Condition]) -> Tuple[List[Any], List[Any]]:
         # Initialize the lists of records
         passed_records = []
         failed_records = []
@@ -15,6 +39,13 @@ class DataFilter:
         if not data:
             return (passed_records, failed_records)
 
+        # Declarative conditions are evaluated column-wise when NumPy is available
+        if np is not None and any(isinstance(condition, tuple) for condition in conditions):
+            passed_indexes, failed_indexes = DataFilter.validate_indexes_by_conditions(data, conditions)
+            return ([data[index] for index in passed_indexes], [data[index] for index in failed_indexes])
+
+        conditions = [DataFilter._as_callable(condition) for condition in conditions]
+
         # Process each record to determine its status based on all conditions
         for record in data:
             passed = all(condition(record) for condition in conditions)
@@ -47,4 +78,240 @@ class DataFilter:
                 result['duplicates'] = group
                 duplicates.append(result)
         
-        return duplicates
\ No newline at end of file
+        return duplicates
+
+    @staticmethod
+    def iter_duplicate_records_by_keys(data: Iterable[Dict[str, Any]], keys: List[str], max_records_in_memory: int = 1000000,
+                                       partitions: int = 64, counts_only: bool = False,
+                                       temp_dir: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Versão em streaming de find_duplicate_records_by_keys para conjuntos maiores que a memória.
+
+        Os registros são agrupados em memória até max_records_in_memory; acima disso, são particionados por hash
+        das chaves em arquivos temporários e cada partição é processada separadamente.
+
+        :param data: Qualquer iterável de registros, consumido uma única vez.
+        :param counts_only: Em vez da lista completa de duplicados, retorna apenas 'count' e 'first' (primeira ocorrência).
+        :return: Gerador de grupos duplicados, no mesmo formato de find_duplicate_records_by_keys.
+        """
+        if not keys:
+            return
+
+        yield from DataFilter._iter_duplicates(
+            ((tuple(record.get(key) for key in keys), record) for record in data),
+            keys, max_records_in_memory, partitions, counts_only, temp_dir, depth=0
+        )
+
+    @staticmethod
+    def _iter_duplicates(entries: Iterator[Tuple[tuple, Dict[str, Any]]], keys: List[str], max_records_in_memory: int,
+                         partitions: int, counts_only: bool, temp_dir: str, depth: int) -> Iterator[Dict[str, Any]]:
+        record_groups = {}
+        buffered = 0
+
+        for key_tuple, record in entries:
+            group = record_groups.get(key_tuple)
+            if group is None:
+                record_groups[key_tuple] = [1, record] if counts_only else [record]
+                buffered += 1
+            elif counts_only:
+                # Only the count and the first occurrence are kept, so the budget applies to distinct keys
+                group[0] += 1
+            else:
+                group.append(record)
+                buffered += 1
+
+            if buffered > max_records_in_memory and depth < MAX_PARTITION_DEPTH:
+                # Memory budget exceeded: spill what is buffered plus the rest of the stream to hash partitions
+                spilled = DataFilter._spilled_entries(record_groups, counts_only)
+                record_groups = None
+                yield from DataFilter._iter_partitioned(
+                    spilled, entries, keys, max_records_in_memory, partitions, counts_only, temp_dir, depth
+                )
+                return
+
+        yield from DataFilter._duplicate_groups(record_groups, keys, counts_only)
+
+    @staticmethod
+    def _spilled_entries(record_groups: Dict[tuple, list], counts_only: bool) -> Iterator[Tuple[tuple, Any]]:
+        for key_tuple, group in record_groups.items():
+            if counts_only:
+                # Counted occurrences travel as a single (count, first) entry
+                yield key_tuple, (group[0], group[1])
+            else:
+                for record in group:
+                    yield key_tuple, record
+
+    @staticmethod
+    def _iter_partitioned(spilled: Iterator[Tuple[tuple, Any]], entries: Iterator[Tuple[tuple, Dict[str, Any]]],
+                          keys: List[str], max_records_in_memory: int, partitions: int, counts_only: bool,
+                          temp_dir: str, depth: int) -> Iterator[Dict[str, Any]]:
+        with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+            paths = [os.path.join(directory, f'partition-{index}.pickle') for index in range(partitions)]
+            files = [open(path, 'wb') for path in paths]
+
+            try:
+                for source, counted in ((spilled, counts_only), (entries, False)):
+                    for key_tuple, value in source:
+                        # Salt the hash with the depth so oversized partitions split differently when recursing
+                        partition = hash((depth, key_tuple)) % partitions
+                        if counts_only and not counted:
+                            value = (1, value)
+                        pickle.dump((key_tuple, value), files[partition], protocol=pickle.HIGHEST_PROTOCOL)
+            finally:
+                for file in files:
+                    file.close()
+
+            for path in paths:
+                yield from DataFilter._iter_partition(
+                    path, keys, max_records_in_memory, partitions, counts_only, temp_dir, depth + 1
+                )
+                os.remove(path)
+
+    @staticmethod
+    def _iter_partition(path: str, keys: List[str], max_records_in_memory: int, partitions: int, counts_only: bool,
+                        temp_dir: str, depth: int) -> Iterator[Dict[str, Any]]:
+        def read_entries():
+            with open(path, 'rb') as file:
+                while True:
+                    try:
+                        yield pickle.load(file)
+                    except EOFError:
+                        return
+
+        if not counts_only:
+            yield from DataFilter._iter_duplicates(
+                read_entries(), keys, max_records_in_memory, partitions, counts_only, temp_dir, depth
+            )
+            return
+
+        # Partition entries already carry (count, first), so merge them instead of counting again
+        record_counts = {}
+        for key_tuple, (count, first) in read_entries():
+            if key_tuple in record_counts:
+                record_counts[key_tuple][0] += count
+            else:
+                record_counts[key_tuple] = [count, first]
+
+        for key_tuple, (count, first) in record_counts.items():
+            if count > 1:
+                result = {key: value for key, value in zip(keys, key_tuple)}
+                result['count'] = count
+                result['first'] = first
+                yield result
+
+    @staticmethod
+    def _duplicate_groups(record_groups: Dict[tuple, list], keys: List[str], counts_only: bool) -> Iterator[Dict[str, Any]]:
+        for key_tuple, group in record_groups.items():
+            if counts_only:
+                count, first = group
+                if count > 1:
+                    result = {key: value for key, value in zip(keys, key_tuple)}
+                    result['count'] = count
+                    result['first'] = first
+                    yield result
+            elif len(group) > 1:
+                result = {key: value for key, value in zip(keys, key_tuple)}
+                result['duplicates'] = group
+                yield result
+
+    @staticmethod
+    def validate_indexes_by_conditions(data: List[Dict[str, Any]], conditions: List[Condition]) -> Tuple[Any, Any]:
+        """
+        Avalia as condições sobre colunas NumPy construídas a partir dos registros.
+
+        Condições declarativas (campo, operador, valor) viram máscaras booleanas vetorizadas; callables arbitrários
+        são avaliados registro a registro, apenas sobre os registros que ainda não falharam.
+        Campos ausentes (None) só satisfazem o operador 'is_null'.
+
+        :return: Tupla com os arrays de índices dos registros aprovados e reprovados.
+        """
+        if np is None:
+            raise Exception('NumPy is required for vectorized validation: pip install numpy')
+
+        mask = np.ones(len(data), dtype=bool)
+        columns = {}
+
+        for condition in conditions:
+            if isinstance(condition, tuple):
+                field, condition_operator, value = condition
+                if field not in columns:
+                    columns[field] = DataFilter._build_column(data, field)
+                mask &= DataFilter._evaluate_column(columns[field], condition_operator, value)
+
+        for condition in conditions:
+            if not isinstance(condition, tuple):
+                for index in np.flatnonzero(mask):
+                    if not condition(data[index]):
+                        mask[index] = False
+
+        return (np.flatnonzero(mask), np.flatnonzero(~mask))
+
+    @staticmethod
+    def _build_column(data: List[Dict[str, Any]], field: str) -> Tuple[Any, Any]:
+        values = np.empty(len(data), dtype=object)
+        values[:] = [record.get(field) for record in data]
+        missing = np.equal(values, None).astype(bool)
+
+        present = values[~missing]
+        # Purely numeric columns are compared natively, everything else falls back to object comparisons.
+        # Integer columns stay int64 so large IDs keep their exact value; float64 is used only when floats are present
+        value_types = set(map(type, present))
+        if value_types <= {int}:
+            try:
+                present = present.astype(np.int64)
+            except OverflowError:
+                pass
+        elif value_types <= {int, float}:
+            present = present.astype(np.float64)
+
+        return (present, missing)
+
+    @staticmethod
+    def _evaluate_column(column: Tuple[Any, Any], condition_operator: str, value: Any) -> Any:
+        present, missing = column
+
+        if condition_operator == 'is_null':
+            return missing.copy()
+
+        mask = np.zeros(len(missing), dtype=bool)
+        if condition_operator == 'not_null':
+            mask[~missing] = True
+        elif condition_operator in ('in', 'not_in'):
+            if present.dtype == object:
+                matches = np.array([item in value for item in present], dtype=bool)
+            else:
+                # A numeric column can only match numeric candidates, same as `in` on the raw values
+                candidates = [item for item in value if isinstance(item, (int, float))]
+                matches = np.isin(present, np.array(candidates)) if candidates else np.zeros(len(present), dtype=bool)
+            mask[~missing] = matches if condition_operator == 'in' else ~matches
+        elif condition_operator in COMPARISON_OPERATORS:
+            mask[~missing] = np.asarray(COMPARISON_OPERATORS[condition_operator](present, value), dtype=bool)
+        else:
+            raise ValueError(f'Unsupported operator: {condition_operator}')
+
+        return mask
+
+    @staticmethod
+    def _as_callable(condition: Condition) -> Callable[[Dict[str, Any]], bool]:
+        if not isinstance(condition, tuple):
+            return condition
+
+        field, condition_operator, value = condition
+
+        def evaluate(record: Dict[str, Any]) -> bool:
+            field_value = record.get(field)
+            if condition_operator == 'is_null':
+                return field_value is None
+            if field_value is None:
+                return False
+            if condition_operator == 'not_null':
+                return True
+            if condition_operator == 'in':
+                return field_value in value
+            if condition_operator == 'not_in':
+                return field_value not in value
+            if condition_operator in COMPARISON_OPERATORS:
+                return COMPARISON_OPERATORS[condition_operator](field_value, value)
+            raise ValueError(f'Unsupported operator: {condition_operator}')
+
+        return evaluate
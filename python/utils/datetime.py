@@ -1,28 +1,169 @@
+import re
 from zoneinfo import ZoneInfo
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Iterable, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# UTC offsets are looked up once per day; days containing a transition are refined in 15-minute buckets,
+# the granularity at which every zone in the tz database changes its offset
+DAY_SECONDS = 86400
+OFFSET_BUCKET_SECONDS = 900
+
+# strftime directives that can be assembled column-wise: zero padding width
+VECTORIZED_DIRECTIVES = {'Y': 4, 'm': 2, 'd': 2, 'H': 2, 'M': 2, 'S': 2, 'y': 2}
+DIRECTIVE_PATTERN = re.compile(r'%(.)')
+
+
+@lru_cache(maxsize=None)
+def get_zone(zone_info: str) -> ZoneInfo:
+    return ZoneInfo(zone_info)
+
 
 class DatetimeUtils:
 
     @staticmethod
     def now(strftime='%Y-%m-%dT%H:%M:%S', zone_info='America/Sao_Paulo') -> str:
-        dt_utc = datetime.now(ZoneInfo('UTC'))
+        dt_utc = datetime.now(timezone.utc)
         
-        return dt_utc.astimezone(ZoneInfo(zone_info)).strftime(strftime)
+        return dt_utc.astimezone(get_zone(zone_info)).strftime(strftime)
     
     @staticmethod
     def parse_by_zone(dt_utc, strftime='%Y-%m-%dT%H:%M:%S', zone_info='America/Sao_Paulo') -> str:
         
         if dt_utc.tzinfo is None:
-            dt_utc = dt_utc.replace(tzinfo=ZoneInfo('UTC'))
+            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
         
-        return dt_utc.astimezone(ZoneInfo(zone_info)).strftime(strftime)
+        return dt_utc.astimezone(get_zone(zone_info)).strftime(strftime)
 
+    @staticmethod
     def parse(dt_utc, strftime) -> str:
         
         if dt_utc.tzinfo is None:
-            dt_utc = dt_utc.replace(tzinfo=ZoneInfo('UTC'))
+            dt_utc = dt_utc.replace(tzinfo=timezone.utc)
 
         if strftime is None:
             strftime = '%Y-%m-%dT%H:%M:%S'
         
-        return dt_utc.strftime(strftime)
\ No newline at end of file
+        return dt_utc.strftime(strftime)
+
+    @staticmethod
+    def to_epoch_seconds(values: Iterable[Any]) -> Any:
+        """Converte epochs, datetime64 ou datetimes (sem tzinfo são tratados como UTC) para um array de segundos."""
+        if np is None:
+            raise Exception('NumPy is required for bulk datetime conversion: pip install numpy')
+
+        if isinstance(values, np.ndarray):
+            if np.issubdtype(values.dtype, np.datetime64):
+                return values.astype('datetime64[s]').astype(np.int64)
+            if np.issubdtype(values.dtype, np.number):
+                return values.astype(np.int64)
+
+        values = list(values)
+        if values and isinstance(values[0], datetime):
+            return np.fromiter(
+                (
+                    int((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp())
+                    for value in values
+                ),
+                dtype=np.int64,
+                count=len(values)
+            )
+
+        return np.asarray(values, dtype=np.int64)
+
+    @staticmethod
+    def _utc_offsets(epochs: Any, zone: ZoneInfo, bucket_seconds: int) -> Any:
+        buckets, inverse = np.unique(epochs // bucket_seconds, return_inverse=True)
+        offsets = np.fromiter(
+            (
+                datetime.fromtimestamp(int(bucket) * bucket_seconds, zone).utcoffset() // timedelta(seconds=1)
+                for bucket in buckets
+            ),
+            dtype=np.int64,
+            count=len(buckets)
+        )
+        return offsets[inverse.reshape(-1)]
+
+    @staticmethod
+    def shift_to_zone(values: Iterable[Any], zone_info='America/Sao_Paulo') -> Any:
+        """Retorna um array datetime64[s] com o horário local da zona, consultando o offset uma vez por dia distinto."""
+        epochs = DatetimeUtils.to_epoch_seconds(values)
+        zone = get_zone(zone_info)
+
+        offsets = DatetimeUtils._utc_offsets(epochs, zone, DAY_SECONDS)
+        day_ends = DatetimeUtils._utc_offsets(epochs // DAY_SECONDS * DAY_SECONDS + DAY_SECONDS - 1, zone, 1)
+
+        # Only days with an offset transition need the finer lookup
+        transition = offsets != day_ends
+        if transition.any():
+            offsets[transition] = DatetimeUtils._utc_offsets(epochs[transition], zone, OFFSET_BUCKET_SECONDS)
+
+        return (epochs + offsets).astype('datetime64[s]')
+
+    @staticmethod
+    def format_many(values: Iterable[Any], strftime='%Y-%m-%dT%H:%M:%S', zone_info='America/Sao_Paulo') -> List[str]:
+        """Versão em lote de parse_by_zone para epochs, datetime64 ou datetimes."""
+        if all(directive in VECTORIZED_DIRECTIVES for directive in DIRECTIVE_PATTERN.findall(strftime)):
+            local_times = DatetimeUtils.shift_to_zone(values, zone_info)
+            if len(local_times) == 0:
+                return []
+            return DatetimeUtils._format_columns(local_times, strftime).tolist()
+
+        # Other directives (including %z and %Z) need an aware datetime, built once per distinct second
+        epochs = DatetimeUtils.to_epoch_seconds(values)
+        if len(epochs) == 0:
+            return []
+
+        zone = get_zone(zone_info)
+        unique_epochs, inverse = np.unique(epochs, return_inverse=True)
+        formatted = [
+            datetime.fromtimestamp(int(seconds), zone).strftime(strftime)
+            for seconds in unique_epochs.tolist()
+        ]
+        return [formatted[index] for index in inverse.reshape(-1)]
+
+    @staticmethod
+    def _format_columns(local_times: Any, strftime: str) -> Any:
+        years = local_times.astype('datetime64[Y]')
+        months = local_times.astype('datetime64[M]')
+        days = local_times.astype('datetime64[D]')
+        seconds_of_day = (local_times - days).astype(np.int64)
+
+        components = {
+            'Y': years.astype(np.int64) + 1970,
+            'y': (years.astype(np.int64) + 1970) % 100,
+            'm': (months - years).astype(np.int64) + 1,
+            'd': (days - months).astype(np.int64) + 1,
+            'H': seconds_of_day // 3600,
+            'M': seconds_of_day // 60 % 60,
+            'S': seconds_of_day % 60,
+        }
+
+        # Each component becomes a zero-padded string through a lookup table instead of per-value formatting
+        two_digits = np.array([f'{value:02d}' for value in range(100)])
+        parts = []
+        position = 0
+        for directive in DIRECTIVE_PATTERN.finditer(strftime):
+            parts.append(strftime[position:directive.start()])
+            code = directive.group(1)
+            if VECTORIZED_DIRECTIVES[code] == 2:
+                parts.append(two_digits[components[code]])
+            else:
+                values, inverse = np.unique(components[code], return_inverse=True)
+                table = np.array([str(value).zfill(VECTORIZED_DIRECTIVES[code]) for value in values.tolist()])
+                parts.append(table[inverse.reshape(-1)])
+            position = directive.end()
+        parts.append(strftime[position:])
+
+        formatted = np.full(len(local_times), '', dtype='U1')
+        for part in parts:
+            if isinstance(part, str) and not part:
+                continue
+            formatted = np.char.add(formatted, part)
+
+        return formatted
@@ -0,0 +1,240 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+from utils.client_factory import client_factory
+
+# Upper bounds, in milliseconds, of the latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+COUNTERS = ('calls', 'errors', 'retries', 'throttles', 'bytes_sent', 'bytes_received')
+
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'TransactionInProgressException',
+    'RequestLimitExceeded', 'BandwidthLimitExceeded', 'LimitExceededException', 'RequestThrottled',
+    'SlowDown', 'PriorRequestNotComplete', 'EC2ThrottledException',
+}
+
+
+def is_throttling_error(error_code: str, status_code: int = None) -> bool:
+    return error_code in THROTTLING_ERROR_CODES or status_code == 429
+
+
+def bucket_percentile(latency_buckets: List[int], fraction: float) -> float:
+    """Estimativa pelo limite superior do bucket que contém o percentil."""
+    total = sum(latency_buckets)
+    if total == 0:
+        return 0.0
+    threshold = fraction * total
+    cumulative = 0
+    for upper_bound, count in zip(LATENCY_BUCKETS_MS, latency_buckets):
+        cumulative += count
+        if cumulative >= threshold:
+            return upper_bound
+    return LATENCY_BUCKETS_MS[-1]
+
+
+class OperationMetrics:
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.throttles = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_sum_ms = 0.0
+        self.latency_buckets = [0] * len(LATENCY_BUCKETS_MS)
+
+    def observe_latency(self, latency_ms: float) -> None:
+        self.latency_sum_ms += latency_ms
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        return bucket_percentile(self.latency_buckets, fraction)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'throttles': self.throttles,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_sum_ms': self.latency_sum_ms,
+            'latency_buckets_ms': dict(zip(map(str, LATENCY_BUCKETS_MS), self.latency_buckets)),
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+        }
+
+
+class ClientInstrumentation:
+    """
+    Coleta métricas por operação a partir dos eventos do botocore (before-call, after-call, needs-retry).
+
+    A latência medida cobre a chamada completa, incluindo as tentativas repetidas.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: Dict[Tuple[str, str], OperationMetrics] = {}
+        self.exported: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.export_lock = threading.Lock()
+
+    def attach(self, client) -> None:
+        events = client.meta.events
+        events.register('before-call', self._before_call, unique_id='instrumentation-before-call')
+        events.register('after-call', self._after_call, unique_id='instrumentation-after-call')
+        events.register('after-call-error', self._after_call_error, unique_id='instrumentation-after-call-error')
+        events.register('needs-retry', self._needs_retry, unique_id='instrumentation-needs-retry')
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Retorna as métricas acumuladas por 'servico.Operacao'."""
+        with self.lock:
+            return {f'{service}.{operation}': metrics.snapshot() for (service, operation), metrics in self.metrics.items()}
+
+    def reset(self) -> None:
+        with self.export_lock, self.lock:
+            self.metrics.clear()
+            self.exported = {}
+
+    def _operation_metrics(self, model) -> OperationMetrics:
+        return self._metrics_for((model.service_model.service_id.hyphenize(), model.name))
+
+    def _metrics_for(self, key: Tuple[str, str]) -> OperationMetrics:
+        metrics = self.metrics.get(key)
+        if metrics is None:
+            metrics = self.metrics[key] = OperationMetrics()
+        return metrics
+
+    def _before_call(self, model, params, context, **kwargs) -> None:
+        context['instrumentation_started_at'] = time.perf_counter()
+        body = params.get('body')
+        context['instrumentation_bytes_sent'] = len(body) if isinstance(body, (bytes, bytearray, str)) else 0
+
+    def _after_call(self, http_response, parsed, model, context, **kwargs) -> None:
+        latency_ms = (time.perf_counter() - context.get('instrumentation_started_at', time.perf_counter())) * 1000
+
+        # Throttles are counted in _needs_retry, which botocore emits after every attempt, including the last one
+        with self.lock:
+            metrics = self._operation_metrics(model)
+            metrics.calls += 1
+            metrics.errors += http_response.status_code >= 300
+            metrics.retries += parsed.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            metrics.bytes_sent += context.get('instrumentation_bytes_sent', 0)
+            metrics.bytes_received += int(http_response.headers.get('content-length') or 0)
+            metrics.observe_latency(latency_ms)
+
+    def _after_call_error(self, event_name, context, **kwargs) -> None:
+        # after-call-error does not carry the operation model, the event name is after-call-error.<service>.<operation>
+        latency_ms = (time.perf_counter() - context.get('instrumentation_started_at', time.perf_counter())) * 1000
+        _, service, operation = event_name.split('.', 2)
+
+        with self.lock:
+            metrics = self._metrics_for((service, operation))
+            metrics.calls += 1
+            metrics.errors += 1
+            metrics.observe_latency(latency_ms)
+
+    def _needs_retry(self, response, operation, attempts, **kwargs) -> None:
+        if response is None:
+            return None
+
+        http_response, parsed = response
+        if http_response.status_code < 300:
+            return None
+
+        error_code = parsed.get('Error', {}).get('Code')
+        if is_throttling_error(error_code, http_response.status_code):
+            with self.lock:
+                self._operation_metrics(operation).throttles += 1
+
+        # Returning None leaves the retry decision to botocore's own handlers
+        return None
+
+    def to_prometheus(self, prefix: str = 'aws_client') -> str:
+        """Exporta o snapshot no formato texto do Prometheus."""
+        lines = []
+        snapshot = self.snapshot()
+
+        for counter in COUNTERS:
+            lines.append(f'# TYPE {prefix}_{counter}_total counter')
+            for name, metrics in snapshot.items():
+                service, operation = name.split('.', 1)
+                lines.append(f'{prefix}_{counter}_total{{service="{service}",operation="{operation}"}} {metrics[counter]}')
+
+        lines.append(f'# TYPE {prefix}_latency_ms histogram')
+        for name, metrics in snapshot.items():
+            service, operation = name.split('.', 1)
+            labels = f'service="{service}",operation="{operation}"'
+            cumulative = 0
+            for upper_bound, count in metrics['latency_buckets_ms'].items():
+                cumulative += count
+                bound = '+Inf' if upper_bound == 'inf' else upper_bound
+                lines.append(f'{prefix}_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_latency_ms_sum{{{labels}}} {metrics["latency_sum_ms"]}')
+            lines.append(f'{prefix}_latency_ms_count{{{labels}}} {cumulative}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export_to_cloudwatch(self, cloudwatch_client, namespace: str = 'AWSClientInstrumentation') -> None:
+        """
+        Publica no CloudWatch o que mudou desde a exportação anterior, dimensionado por serviço e operação.
+
+        Os contadores são enviados como diferenças, para que a soma no CloudWatch corresponda ao total de chamadas,
+        e o p99 é calculado apenas com as latências observadas no intervalo.
+        """
+        with self.export_lock:
+            snapshot = self.snapshot()
+            metric_data = []
+
+            for name, metrics in snapshot.items():
+                previous = self.exported.get(name)
+                if previous is not None and metrics['calls'] == previous['calls']:
+                    continue
+
+                service, operation = name.split('.', 1)
+                dimensions = [{'Name': 'Service', 'Value': service}, {'Name': 'Operation', 'Value': operation}]
+                for counter in COUNTERS:
+                    value = metrics[counter] - (previous[counter] if previous else 0)
+                    metric_data.append({'MetricName': counter, 'Dimensions': dimensions, 'Value': value, 'Unit': 'Count'})
+
+                latency_buckets = [
+                    count - (previous['latency_buckets_ms'][upper_bound] if previous else 0)
+                    for upper_bound, count in metrics['latency_buckets_ms'].items()
+                ]
+                # CloudWatch rejects infinite values, report the overflow bucket as its lower bound
+                metric_data.append({
+                    'MetricName': 'p99_latency',
+                    'Dimensions': dimensions,
+                    'Value': min(bucket_percentile(latency_buckets, 0.99), LATENCY_BUCKETS_MS[-2]),
+                    'Unit': 'Milliseconds'
+                })
+
+            for index in range(0, len(metric_data), 1000):
+                cloudwatch_client.put_metric_data(Namespace=namespace, MetricData=metric_data[index:index + 1000])
+
+            self.exported = snapshot
+
+instrumentation = None
+
+
+def instrument_clients() -> ClientInstrumentation:
+    """Ativa a instrumentação em todos os clientes compartilhados, atuais e futuros, e a retorna."""
+    global instrumentation
+
+    if instrumentation is None:
+        instrumentation = ClientInstrumentation()
+        client_factory.add_client_hook(instrumentation.attach)
+
+    return instrumentation
+
+
+if __name__ == '__main__':
+    from storage.s3 import S3Manager
+
+    metrics = instrument_clients()
+    S3Manager().list_objects('example-bucket')
+    print(metrics.to_prometheus())
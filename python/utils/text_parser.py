@@ -1,4 +1,145 @@
+import codecs
 import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+class PatternSet:
+    """
+    Conjunto de expressões regulares compiladas uma única vez e agrupadas por targetKey.
+
+    Cada targetKey é lido uma única vez por dicionário e recebe todos os seus padrões em sequência.
+    Produz o mesmo resultado de TextParser.apply_patterns_to_dict: mesma ordem de parâmetros e
+    parâmetros cujo targetKey falhou ficam de fora.
+    """
+
+    def __init__(self, regex_entries: List[Dict[str, str]], flags: int = re.DOTALL) -> None:
+        self.parameters: List[str] = []
+        self.targets: Dict[str, List[Tuple[int, re.Pattern]]] = {}
+
+        for index, matching_input in enumerate(regex_entries):
+            self.parameters.append(matching_input.get("parameter"))
+            self.targets.setdefault(matching_input.get("targetKey"), []).append(
+                (index, compile_pattern(matching_input.get("regex"), flags))
+            )
+
+    def apply(self, dict) -> Dict[str, List[Any]]:
+        """Aplica os padrões a um dicionário, retornando o mesmo formato de TextParser.apply_patterns_to_dict."""
+        matches_by_entry = [None] * len(self.parameters)
+
+        for targetKey, patterns in self.targets.items():
+            try:
+                text = dict[targetKey]
+            except Exception as exception:
+                for _, pattern in patterns:
+                    print(f'Failed to parse {targetKey} using regex {pattern.pattern}: {str(exception)}')
+                continue
+
+            for index, pattern in patterns:
+                try:
+                    matches_by_entry[index] = pattern.findall(text)
+                except Exception as exception:
+                    print(f'Failed to parse {targetKey} using regex {pattern.pattern}: {str(exception)}')
+
+        # Results are assembled in entry order so the parameter order matches apply_patterns_to_dict
+        results = {}
+        for parameter, matches in zip(self.parameters, matches_by_entry):
+            if matches is not None:
+                results.setdefault(parameter, []).extend(matches)
+
+        return results
+
+    def apply_many(self, dicts: Iterable[dict]) -> Iterator[Dict[str, List[Any]]]:
+        """Aplica os padrões a vários dicionários, gerando um resultado por dicionário."""
+        for dict in dicts:
+            yield self.apply(dict)
+
+
+class StreamMatch(NamedTuple):
+    start: int
+    end: int
+    text: str
+    groups: Tuple[Any, ...]
+
+
+class IncrementalMatcher:
+    """
+    Aplica uma expressão regular a um texto recebido em partes (StreamingBody, WebSocket...).
+
+    Entre uma parte e outra é mantida apenas uma janela de max_match_length caracteres (mais lookbehind
+    caracteres de contexto), então o uso de memória não depende do tamanho total da entrada. Uma correspondência
+    é emitida assim que nenhum dado futuro pode alterá-la, o que vale para padrões cujas correspondências têm
+    no máximo max_match_length caracteres.
+    """
+
+    def __init__(self, pattern: Union[str, re.Pattern], max_match_length: int = 4096, lookbehind: int = 64,
+                 flags: int = 0, encoding: str = 'utf-8') -> None:
+        self.pattern = compile_pattern(pattern, flags) if isinstance(pattern, str) else pattern
+        self.max_match_length = max_match_length
+        self.lookbehind = lookbehind
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.buffer = ''
+        self.buffer_offset = 0
+        self.scan_from = 0
+
+    def feed(self, chunk: Union[str, bytes]) -> List[StreamMatch]:
+        """Adiciona uma parte do texto e retorna as correspondências que já são definitivas."""
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            chunk = self.decoder.decode(chunk)
+
+        self.buffer += chunk
+        cutoff = len(self.buffer) - self.max_match_length
+        if cutoff <= self.scan_from:
+            return []
+
+        matches = []
+        emitted_until = self.scan_from
+        keep_from = cutoff
+        for match in self.pattern.finditer(self.buffer, self.scan_from):
+            # Any match that could still grow starts inside the trailing window
+            if match.start() >= cutoff or match.end() >= len(self.buffer):
+                keep_from = max(emitted_until, min(match.start(), cutoff))
+                break
+            matches.append(self._stream_match(match))
+            emitted_until = match.end() if match.end() > match.start() else match.end() + 1
+            keep_from = max(emitted_until, cutoff)
+
+        self._discard_until(keep_from)
+        return matches
+
+    def close(self) -> List[StreamMatch]:
+        """Sinaliza o fim da entrada e retorna as correspondências restantes."""
+        self.buffer += self.decoder.decode(b'', final=True)
+        matches = [self._stream_match(match) for match in self.pattern.finditer(self.buffer, self.scan_from)]
+        self._discard_until(len(self.buffer))
+        return matches
+
+    def iter_matches(self, chunks: Iterable[Union[str, bytes]]) -> Iterator[StreamMatch]:
+        """Consome um iterável de partes, gerando as correspondências à medida que se tornam definitivas."""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+    def _stream_match(self, match: re.Match) -> StreamMatch:
+        return StreamMatch(
+            start=self.buffer_offset + match.start(),
+            end=self.buffer_offset + match.end(),
+            text=match.group(0),
+            groups=match.groups('')
+        )
+
+    def _discard_until(self, position: int) -> None:
+        # Keep a few characters before the scan position so lookbehinds and \b still see their context
+        base = max(0, position - self.lookbehind)
+        self.buffer = self.buffer[base:]
+        self.buffer_offset += base
+        self.scan_from = position - base
+
 
 class TextParser:
 
@@ -20,7 +161,7 @@ class TextParser:
             targetKey = matching_input.get("targetKey")
 
             try:
-                matches = re.findall(regex, dict[targetKey], re.DOTALL)
+                matches = compile_pattern(regex, re.DOTALL).findall(dict[targetKey])
 
                 if parameter not in results:
                     results[parameter] = []
@@ -43,7 +184,7 @@ class TextParser:
         """
         try:
 
-            matches = re.search(pattern, string)
+            matches = compile_pattern(pattern).search(string)
 
             if matches is None:
                 return ()